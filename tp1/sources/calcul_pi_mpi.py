@@ -5,24 +5,32 @@ TP1 - Section 2.2 : Calcul approché de π - Version mpi4py
 Parallélisation en mémoire distribuée avec mpi4py
 
 Installation : pip install mpi4py numpy
-Exécution    : mpirun -np 4 python3 calcul_pi_mpi.py [nombre_de_points]
+Exécution    : mpirun -np 4 python3 calcul_pi_mpi.py [nombre_de_points] [--trace FICHIER]
 """
 
 import numpy as np
 from mpi4py import MPI
+import argparse
+import os
 import sys
 import time
+# Traceur MPI partagé avec le TP2
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tp2'))
+from mpi_trace import Tracer
 
 def main():
+    parser = argparse.ArgumentParser(description="Calcul approché de π (mpi4py)")
+    # Nombre de points par défaut : 10^8
+    parser.add_argument('nbSamples', type=int, nargs='?', default=100_000_000)
+    parser.add_argument('--trace', default=None, metavar='FICHIER',
+                        help="Trace d'exécution par processus (JSON, ui.perfetto.dev)")
+    args = parser.parse_args()
+
     comm = MPI.COMM_WORLD
     rank = comm.Get_rank()
     nbp = comm.Get_size()
-    
-    # Nombre de points par défaut
-    nbSamples = 100_000_000  # 10^8
-    
-    if len(sys.argv) > 1:
-        nbSamples = int(sys.argv[1])
+    tracer = Tracer(comm, enabled=args.trace is not None)
+    nbSamples = args.nbSamples
     
     # Chaque processus traite sa portion
     samples_per_proc = nbSamples // nbp
@@ -39,21 +47,25 @@ def main():
     start_time = MPI.Wtime()
     
     # Génération des points et comptage
-    x = np.random.uniform(-1.0, 1.0, my_samples)
-    y = np.random.uniform(-1.0, 1.0, my_samples)
-    local_darts = np.sum(x*x + y*y <= 1.0)
+    with tracer.span('compute'):
+        x = np.random.uniform(-1.0, 1.0, my_samples)
+        y = np.random.uniform(-1.0, 1.0, my_samples)
+        local_darts = np.array([np.count_nonzero(x*x + y*y <= 1.0)], dtype=np.int64)
     
-    # Réduction : somme de tous les compteurs locaux
-    total_darts = comm.reduce(local_darts, op=MPI.SUM, root=0)
+    # Réduction : somme de tous les compteurs locaux (Reduce sur tampons, sans sérialisation)
+    total_darts = np.zeros(1, dtype=np.int64)
+    with tracer.span('collective', 'Reduce'):
+        comm.Reduce(local_darts, total_darts, op=MPI.SUM, root=0)
     
     # Synchronisation à la fin
-    comm.Barrier()
+    with tracer.span('wait', 'Barrier'):
+        comm.Barrier()
     end_time = MPI.Wtime()
     elapsed = end_time - start_time
     
     # Le processus 0 affiche le résultat
     if rank == 0:
-        pi = 4.0 * total_darts / nbSamples
+        pi = 4.0 * total_darts[0] / nbSamples
         error = abs(pi - np.pi) / np.pi * 100.0
         
         print("=== Calcul de π - Version mpi4py ===")
@@ -64,5 +76,7 @@ def main():
         print(f"Erreur     : {error:.6f} %")
         print(f"Temps      : {elapsed:.6f} secondes")
 
+    tracer.save(args.trace, f"calcul_pi_mpi ({nbp} processus)")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,46 @@
+"""
+Benchmark du rassemblement des lignes d'une répartition cyclique :
+type dérivé strié (gather_cyclic) contre Gatherv + reconstruction (gather_cyclic_reassemble)
+
+Usage :
+    mpirun -np 4 python3 bench_cyclic_gather.py
+    mpirun -np 8 python3 bench_cyclic_gather.py --sizes 1024 2048 4096 8192 --repeat 5
+"""
+from mpi4py import MPI
+import numpy as np
+import argparse
+from mandelbrot_gather import gather_cyclic, gather_cyclic_reassemble
+
+parser = argparse.ArgumentParser(description="Benchmark du rassemblement cyclique")
+parser.add_argument('--sizes', type=int, nargs='+', default=[1024, 2048, 4096, 8192],
+                    help='Côtés des images carrées testées')
+parser.add_argument('--repeat', type=int, default=3, help='Nombre de mesures (on garde la meilleure)')
+args = parser.parse_args()
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+methods = {'strié': gather_cyclic, 'reconstruction': gather_cyclic_reassemble}
+
+if rank == 0:
+    print(f"=== Rassemblement cyclique, {size} processus ===")
+    print(f"{'taille':>12} {'méthode':>15} {'temps (s)':>10} {'Go/s':>8}")
+
+for n in args.sizes:
+    # Données locales : la valeur de chaque pixel est son numéro de ligne global
+    rows = np.arange(rank, n, size)
+    local_data = np.repeat(rows.astype(np.double)[:, np.newaxis], n, axis=1)
+    for name, gather in methods.items():
+        best = float('inf')
+        for _ in range(args.repeat):
+            comm.Barrier()
+            deb = MPI.Wtime()
+            image = gather(comm, local_data, n, root=0)
+            best = min(best, MPI.Wtime() - deb)
+        best = comm.reduce(best, op=MPI.MAX, root=0)
+        if rank == 0:
+            assert np.array_equal(image[:, 0], np.arange(n)), "lignes mal placées"
+            print(f"{n:>5}x{n:<6} {name:>15} {best:>10.4f} {n*n*8/best/1e9:>8.2f}")
+        del image
+    del local_data
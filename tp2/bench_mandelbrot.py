@@ -0,0 +1,166 @@
+"""
+Benchmark de toutes les stratégies Mandelbrot du TP2
+
+Chaque combinaison (stratégie, taille d'image, max_iterations, nombre de processus) est
+lancée --repeat fois dans un sous-processus (mpirun pour les versions MPI) ; le temps
+est lu sur la ligne "BENCH:{...}" (JSON) affichée par le script :
+
+    seq          : mandelbrot.py, temps de calcul
+    vec          : mandelbrot_vec.py (couleurs, 200 itérations par défaut), temps de calcul
+    block        : mandelbrot_block.py, temps de calcul maximum sur les processus
+    cyclic       : mandelbrot_cyclic.py, temps de calcul maximum sur les processus
+    master_slave : mandelbrot_master_slave.py (au moins 2 processus), temps total
+
+Pour chaque combinaison on garde la médiane et l'écart interquartile (IQR) des mesures,
+ainsi que les temps par processus de la mesure médiane (block, cyclic). Les résultats sont
+écrits dans <output>.json (liste d'enregistrements + contexte de la machine) et
+<output>.csv, puis lus par plot_results.py.
+
+Usage :
+    python3 bench_mandelbrot.py
+    python3 bench_mandelbrot.py --sizes 512 1024 2048 --iterations 50 200 --procs 1 2 4 8 --repeat 7
+    python3 bench_mandelbrot.py --strategies seq block --mpi-args "--oversubscribe --allow-run-as-root"
+"""
+import numpy as np
+import argparse
+import csv
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+# Script et exécution par MPI de chaque stratégie
+STRATEGIES = {
+    'seq': ('mandelbrot.py', False),
+    'vec': ('mandelbrot_vec.py', False),
+    'block': ('mandelbrot_block.py', True),
+    'cyclic': ('mandelbrot_cyclic.py', True),
+    'master_slave': ('mandelbrot_master_slave.py', True),
+}
+# Nombre minimal de processus de chaque stratégie MPI
+MIN_PROCS = {'master_slave': 2}
+CSV_FIELDS = ['strategy', 'width', 'height', 'max_iterations', 'nprocs', 'repeat',
+              'median', 'q1', 'q3', 'iqr', 'min', 'max', 'samples']
+
+
+def command(strategy, width, height, max_iterations, nprocs, mpirun, mpi_args):
+    script, uses_mpi = STRATEGIES[strategy]
+    cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), script),
+           '--width', str(width), '--height', str(height),
+           '--max-iterations', str(max_iterations)]
+    if uses_mpi:
+        cmd = [mpirun, *mpi_args, '-np', str(nprocs)] + cmd
+    return cmd
+
+
+def parse_bench(stdout):
+    """
+    Mesure BENCH:{...} de la sortie d'un script. mpirun mélange les sorties des processus :
+    le marqueur peut être précédé ou suivi d'autre texte sur la même ligne, seul l'objet
+    JSON qui le suit est décodé (ValueError s'il est tronqué)
+    """
+    for line in stdout.splitlines():
+        idx = line.find('BENCH:')
+        if idx >= 0:
+            return json.JSONDecoder().raw_decode(line, idx + len('BENCH:'))[0]
+    raise RuntimeError("ligne BENCH: absente de la sortie")
+
+
+def measure(cmd, repeat, workdir, timeout):
+    """repeat mesures de cmd, exécutée dans workdir (les images y sont enregistrées)"""
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=workdir,
+                                timeout=timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"échec ({result.returncode}) : {result.stderr.strip()[-500:]}")
+        runs.append(parse_bench(result.stdout))
+    return runs
+
+
+def summarize(strategy, width, height, max_iterations, nprocs, runs):
+    """Enregistrement d'une combinaison : médiane, quartiles et mesures brutes"""
+    samples = np.array([run['time'] for run in runs])
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    record = {
+        'strategy': strategy, 'width': width, 'height': height,
+        'max_iterations': max_iterations, 'nprocs': nprocs, 'repeat': len(runs),
+        'median': float(median), 'q1': float(q1), 'q3': float(q3), 'iqr': float(q3 - q1),
+        'min': float(samples.min()), 'max': float(samples.max()),
+        'samples': samples.tolist(),
+    }
+    # Temps par processus de la mesure la plus proche de la médiane
+    median_run = runs[int(np.argmin(np.abs(samples - median)))]
+    if 'local_times' in median_run:
+        record['local_times'] = median_run['local_times']
+    return record
+
+
+def write_records(records, output, context):
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output + '.json', 'w') as f:
+        json.dump({'context': context, 'records': records}, f, indent=1)
+    with open(output + '.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for record in records:
+            writer.writerow({**record, 'samples': ' '.join(f"{t:.6f}" for t in record['samples'])})
+
+
+def run_all(args, mpirun, context):
+    """Mesure toutes les combinaisons ; les résultats sont réécrits après chacune"""
+    records = []
+    combinations = [(s, n, it, p) for s in args.strategies for n in args.sizes
+                    for it in args.iterations
+                    for p in (args.procs if STRATEGIES[s][1] else [1])
+                    if p >= MIN_PROCS.get(s, 1)]
+    with tempfile.TemporaryDirectory() as workdir:
+        for i, (strategy, n, max_iterations, nprocs) in enumerate(combinations):
+            cmd = command(strategy, n, n, max_iterations, nprocs, mpirun, args.mpi_args.split())
+            label = f"{strategy} {n}x{n}, {max_iterations} itérations, {nprocs} processus"
+            try:
+                runs = measure(cmd, args.repeat, workdir, args.timeout)
+            except (RuntimeError, ValueError, subprocess.TimeoutExpired) as e:
+                print(f"[{i+1}/{len(combinations)}] {label} : {e}")
+                continue
+            record = summarize(strategy, n, n, max_iterations, nprocs, runs)
+            records.append(record)
+            write_records(records, args.output, context)
+            print(f"[{i+1}/{len(combinations)}] {label} : médiane {record['median']:.4f}s, "
+                  f"IQR {record['iqr']:.4f}s")
+    return records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark des stratégies Mandelbrot")
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES),
+                        default=list(STRATEGIES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1024],
+                        help="Côtés des images (carrées)")
+    parser.add_argument('--iterations', nargs='+', type=int, default=[50],
+                        help="Valeurs de max_iterations")
+    parser.add_argument('--procs', nargs='+', type=int, default=[1, 2, 4, 8],
+                        help="Nombres de processus des stratégies MPI")
+    parser.add_argument('--repeat', type=int, default=5, help="Mesures par combinaison")
+    parser.add_argument('--output', default='results/bench_mandelbrot',
+                        help="Préfixe des fichiers de résultats (.json et .csv)")
+    parser.add_argument('--mpi-args', default='--oversubscribe',
+                        help="Options passées à mpirun")
+    parser.add_argument('--timeout', type=float, default=600, help="Durée maximale d'une exécution (s)")
+    args = parser.parse_args()
+
+    mpirun = shutil.which('mpirun')
+    if mpirun is None and any(STRATEGIES[s][1] for s in args.strategies):
+        print("ERREUR: mpirun introuvable")
+        sys.exit(1)
+
+    context = {'date': datetime.now().isoformat(timespec='seconds'),
+               'host': platform.node(), 'cpus': os.cpu_count(),
+               'python': platform.python_version(), 'numpy': np.__version__}
+    records = run_all(args, mpirun, context)
+    write_records(records, args.output, context)
+    print(f"\n{len(records)} enregistrements -> {args.output}.json, {args.output}.csv")
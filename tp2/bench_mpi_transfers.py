@@ -0,0 +1,115 @@
+"""
+Benchmark des échanges MPI : objets sérialisés (send/recv, reduce en minuscules, pickle)
+contre tampons (Send/Recv, Reduce en majuscules, tampons de réception préalloués)
+
+Les tailles testées sont celles des messages des TP :
+    - ligne et paquet de 32 lignes de Mandelbrot (1024 doubles par ligne), image entière
+    - ligne fantôme et grille complète du jeu de la vie (uint8), grilles glider_gun et
+      block_switch_engine
+    - compteur du calcul de pi (un entier, réduit sur tous les processus)
+
+Échange aller-retour entre les processus 0 et 1 (temps par message = moitié de
+l'aller-retour) ; la réduction utilise tous les processus.
+
+Usage :
+    mpirun -np 2 python3 bench_mpi_transfers.py
+    mpirun -np 4 python3 bench_mpi_transfers.py --repeat 200
+"""
+from mpi4py import MPI
+import numpy as np
+import argparse
+import pickle
+
+parser = argparse.ArgumentParser(description="Benchmark pickle vs tampons MPI")
+parser.add_argument('--repeat', type=int, default=100, help="Nombre d'allers-retours par taille")
+args = parser.parse_args()
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+if size < 2:
+    if rank == 0:
+        print("ERREUR: ce benchmark nécessite au moins 2 processus")
+    MPI.Finalize()
+    exit(1)
+
+# (description, forme, type) des messages point à point
+MESSAGES = [
+    ("GoL ligne fantôme (100)", (100,), np.uint8),
+    ("GoL grille glider_gun", (200, 100), np.uint8),
+    ("GoL grille block_switch_engine", (400, 400), np.uint8),
+    ("Mandelbrot 1 ligne", (1, 1024), np.double),
+    ("Mandelbrot 32 lignes", (32, 1024), np.double),
+    ("Mandelbrot image 1024x1024", (1024, 1024), np.double),
+]
+
+
+def ping_pong_pickle(data, repeat):
+    """Aller-retours send/recv (sérialisation pickle à chaque message)"""
+    comm.Barrier()
+    deb = MPI.Wtime()
+    for _ in range(repeat):
+        if rank == 0:
+            comm.send(data, dest=1, tag=1)
+            data = comm.recv(source=1, tag=2)
+        elif rank == 1:
+            data = comm.recv(source=0, tag=1)
+            comm.send(data, dest=0, tag=2)
+    return (MPI.Wtime() - deb) / (2*repeat)
+
+
+def ping_pong_buffer(data, repeat):
+    """Aller-retours Send/Recv dans un tampon de réception préalloué"""
+    buffer = np.empty_like(data)
+    comm.Barrier()
+    deb = MPI.Wtime()
+    for _ in range(repeat):
+        if rank == 0:
+            comm.Send(data, dest=1, tag=1)
+            comm.Recv(buffer, source=1, tag=2)
+        elif rank == 1:
+            comm.Recv(buffer, source=0, tag=1)
+            comm.Send(buffer, dest=0, tag=2)
+    return (MPI.Wtime() - deb) / (2*repeat)
+
+
+def reduce_pickle(repeat):
+    value = np.int64(rank)
+    comm.Barrier()
+    deb = MPI.Wtime()
+    for _ in range(repeat):
+        comm.reduce(value, op=MPI.SUM, root=0)
+    return (MPI.Wtime() - deb) / repeat
+
+
+def reduce_buffer(repeat):
+    value = np.array([rank], dtype=np.int64)
+    total = np.empty(1, dtype=np.int64)
+    comm.Barrier()
+    deb = MPI.Wtime()
+    for _ in range(repeat):
+        comm.Reduce(value, total, op=MPI.SUM, root=0)
+    return (MPI.Wtime() - deb) / repeat
+
+
+if rank == 0:
+    print(f"=== Échanges pickle vs tampons, {size} processus, {args.repeat} répétitions ===")
+    print(f"{'message':>32} {'octets pickle':>14} {'octets tampon':>14} "
+          f"{'pickle (µs)':>12} {'tampon (µs)':>12} {'gain':>6}")
+
+for name, shape, dtype in MESSAGES:
+    data = np.zeros(shape, dtype=dtype)
+    t_pickle = ping_pong_pickle(data, args.repeat)
+    t_buffer = ping_pong_buffer(data, args.repeat)
+    if rank == 0:
+        pickled = len(pickle.dumps(data, protocol=MPI.pickle.PROTOCOL))
+        print(f"{name:>32} {pickled:>14} {data.nbytes:>14} "
+              f"{t_pickle*1e6:>12.1f} {t_buffer*1e6:>12.1f} {t_pickle/t_buffer:>5.1f}x")
+
+t_pickle = comm.reduce(reduce_pickle(args.repeat), op=MPI.MAX, root=0)
+t_buffer = comm.reduce(reduce_buffer(args.repeat), op=MPI.MAX, root=0)
+if rank == 0:
+    pickled = len(pickle.dumps(np.int64(0), protocol=MPI.pickle.PROTOCOL))
+    print(f"{'pi : réduction du compteur':>32} {pickled:>14} {8:>14} "
+          f"{t_pickle*1e6:>12.1f} {t_buffer*1e6:>12.1f} {t_pickle/t_buffer:>5.1f}x")
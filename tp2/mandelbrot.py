@@ -1,73 +1,95 @@
 # Calcul de l'ensemble de Mandelbrot en python
 import numpy as np
-from dataclasses import dataclass
+import argparse
+import json
 from PIL import Image
-from math import log
 from time import time
+from mandelbrot_engine import (MandelbrotSet, complex_grid, grayscale, BACKENDS,
+                               PROGRESSIVE_STRIDES, progressive_subgrids, progressive_batches,
+                               convergence_subgrids, scatter_subgrids)
+from mandelbrot_cache import TileCache, render_cached
 # import matplotlib.cm
 
-
-@dataclass
-class MandelbrotSet:
-    max_iterations: int
-    escape_radius:  float = 2.0
-
-    def __contains__(self, c: complex) -> bool:
-        return self.stability(c) == 1
-
-    def convergence(self, c: complex, smooth=False, clamp=True) -> float:
-        value = self.count_iterations(c, smooth)/self.max_iterations
-        return max(0.0, min(value, 1.0)) if clamp else value
-
-    def count_iterations(self, c: complex,  smooth=False) -> int | float:
-        z:    complex
-        iter: int
-
-        # On vérifie dans un premier temps si le complexe
-        # n'appartient pas à une zone de convergence connue :
-        #   1. Appartenance aux disques  C0{(0,0),1/4} et C1{(-1,0),1/4}
-        if c.real*c.real+c.imag*c.imag < 0.0625:
-            return self.max_iterations
-        if (c.real+1)*(c.real+1)+c.imag*c.imag < 0.0625:
-            return self.max_iterations
-        #  2.  Appartenance à la cardioïde {(1/4,0),1/2(1-cos(theta))}
-        if (c.real > -0.75) and (c.real < 0.5):
-            ct = c.real-0.25 + 1.j * c.imag
-            ctnrm2 = abs(ct)
-            if ctnrm2 < 0.5*(1-ct.real/max(ctnrm2, 1.E-14)):
-                return self.max_iterations
-        # Sinon on itère
-        z = 0
-        for iter in range(self.max_iterations):
-            z = z*z + c
-            if abs(z) > self.escape_radius:
-                if smooth:
-                    return iter + 1 - log(log(abs(z)))/log(2)
-                return iter
-        return self.max_iterations
-
+parser = argparse.ArgumentParser(description="Ensemble de Mandelbrot (séquentiel)")
+parser.add_argument('--backend', choices=BACKENDS, default='numpy',
+                    help='Implémentation du calcul : boucle python, numpy vectorisé ou numba')
+parser.add_argument('--progressive', action='store_true',
+                    help='Rendu par passes (1/64, 1/16, 1/4 puis tous les pixels), '
+                         'avec un aperçu enregistré après chaque passe (les passes de '
+                         'moins de 65536 pixels sont regroupées avec les suivantes)')
+parser.add_argument('--cache-dir', default=None,
+                    help='Calcul par tuiles, réutilisées depuis ce dossier (fichiers .npy)')
+parser.add_argument('--width', type=int, default=1024)
+parser.add_argument('--height', type=int, default=1024)
+parser.add_argument('--max-iterations', type=int, default=50)
+parser.add_argument('--cache-mb', type=float, default=256,
+                    help='Taille maximale (Mo) du cache de tuiles en mémoire')
+parser.add_argument('--pan', type=int, default=0, metavar='N',
+                    help='Calcule ensuite N vues décalées de 1/8 de largeur vers la droite, '
+                         'à partir du cache de tuiles en mémoire')
+args = parser.parse_args()
+if args.progressive and (args.cache_dir is not None or args.pan > 0):
+    parser.error("--progressive n'est pas compatible avec --cache-dir et --pan")
 
 # On peut changer les paramètres des deux prochaines lignes
-mandelbrot_set = MandelbrotSet(max_iterations=50, escape_radius=10)
-width, height = 1024, 1024
+mandelbrot_set = MandelbrotSet(max_iterations=args.max_iterations, escape_radius=10,
+                               backend=args.backend)
+width, height = args.width, args.height
 
 scaleX = 3./width
 scaleY = 2.25/height
-convergence = np.empty((width, height), dtype=np.double)
+convergence = np.empty((height, width), dtype=np.double)
 # Calcul de l'ensemble de mandelbrot :
 deb = time()
-for y in range(height):
-    for x in range(width):
-        c = complex(-2. + scaleX*x, -1.125 + scaleY * y)
-        convergence[x, y] = mandelbrot_set.convergence(c, smooth=True)
+# Temps d'écriture des aperçus, compté à part comme la constitution de l'image finale
+t_previews = 0.
+if args.progressive:
+    # Chaque passe ne calcule que les pixels absents des passes précédentes ;
+    # l'aperçu est l'image sous-échantillonnée au pas de la dernière passe du groupe
+    for batch in progressive_batches(PROGRESSIVE_STRIDES, width, height):
+        subgrids = [subgrid for index in batch
+                    for subgrid in progressive_subgrids(PROGRESSIVE_STRIDES, index, 0, height, width)]
+        values = convergence_subgrids(mandelbrot_set, subgrids, scaleX, scaleY, smooth=True)
+        scatter_subgrids(convergence, subgrids, values)
+        stride = PROGRESSIVE_STRIDES[batch[-1]]
+        if stride > 1:
+            print(f"Aperçu 1/{stride*stride} : {time()-deb-t_previews:.4f}s")
+            t0 = time()
+            Image.fromarray(grayscale(convergence[::stride, ::stride])).save(
+                f"mandelbrot_preview_{stride}.png")
+            t_previews += time() - t0
+elif args.cache_dir is not None or args.pan > 0:
+    # Cache en mémoire (et sur disque avec --cache-dir) : les vues de --pan recouvrent
+    # la première aux 7/8 et n'en recalculent que les nouvelles tuiles
+    cache = TileCache(int(args.cache_mb*2**20), args.cache_dir)
+    render_cached(mandelbrot_set, cache, width, height, scaleX, scaleY, smooth=True,
+                  out=convergence)
+    print(f"Cache de tuiles : {cache.stats()}")
+else:
+    c = complex_grid(range(height), width, scaleX, scaleY)
+    mandelbrot_set.convergence_tile(c, smooth=True, out=convergence)
 fin = time()
-print(f"Temps du calcul de l'ensemble de Mandelbrot : {fin-deb}")
+t_calc = fin - deb - t_previews
+print(f"Temps du calcul de l'ensemble de Mandelbrot : {t_calc}")
+if args.progressive:
+    print(f"Temps d'écriture des aperçus : {t_previews:.4f}s")
+print(f"Points sortis par détection de cycle : {mandelbrot_set.nb_periodic}/{width*height}")
+if args.pan > 0:
+    view = np.empty_like(convergence)
+    for k in range(1, args.pan + 1):
+        deb = time()
+        render_cached(mandelbrot_set, cache, width, height, scaleX, scaleY,
+                      x_min=-2. + k*(width//8)*scaleX, smooth=True, out=view)
+        print(f"Vue décalée {k} : {time()-deb:.4f}s")
+    print(f"Cache de tuiles : {cache.stats()}")
 
 # Constitution de l'image résultante :
 deb = time()
-# image = Image.fromarray(np.uint8(matplotlib.cm.plasma(convergence.T)*255))
+# image = Image.fromarray(np.uint8(matplotlib.cm.plasma(convergence)*255))
 # Simple grayscale mapping
-image = Image.fromarray(np.uint8(convergence.T * 255))
+image = Image.fromarray(grayscale(convergence))
 fin = time()
 print(f"Temps de constitution de l'image : {fin-deb}")
 image.save("mandelbrot.png")
+# Mesure lue par bench_mandelbrot.py
+print("BENCH:" + json.dumps({"time": t_calc}))
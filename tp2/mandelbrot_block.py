@@ -2,117 +2,127 @@
 Ensemble de Mandelbrot - Partition par blocs de lignes
 Chaque processus calcule un bloc contigu de lignes
 
+Options :
+    --partition even : même nombre de lignes par processus (par défaut)
+    --partition cost : blocs de même coût estimé, d'après un aperçu basse résolution
+                       (1 pixel sur 16) calculé par le processus 0
+    --backend numba  : noyau compilé multi-thread (MPI x threads, NUMBA_NUM_THREADS)
+    --trace FICHIER  : trace calcul / Gatherv de chaque processus (mpi_trace.py)
+
 TP2 - Question 1.1
 """
 from mpi4py import MPI
 import numpy as np
-from dataclasses import dataclass
+import argparse
+import json
 from PIL import Image
-from math import log
 from time import time
-
-@dataclass
-class MandelbrotSet:
-    max_iterations: int
-    escape_radius:  float = 2.0
-
-    def convergence(self, c: complex, smooth=False, clamp=True) -> float:
-        value = self.count_iterations(c, smooth)/self.max_iterations
-        return max(0.0, min(value, 1.0)) if clamp else value
-
-    def count_iterations(self, c: complex, smooth=False) -> int | float:
-        # Vérification des zones de convergence connues
-        if c.real*c.real+c.imag*c.imag < 0.0625:
-            return self.max_iterations
-        if (c.real+1)*(c.real+1)+c.imag*c.imag < 0.0625:
-            return self.max_iterations
-        if (c.real > -0.75) and (c.real < 0.5):
-            ct = c.real-0.25 + 1.j * c.imag
-            ctnrm2 = abs(ct)
-            if ctnrm2 < 0.5*(1-ct.real/max(ctnrm2, 1.E-14)):
-                return self.max_iterations
-        # Itération
-        z = 0
-        for iter in range(self.max_iterations):
-            z = z*z + c
-            if abs(z) > self.escape_radius:
-                if smooth:
-                    return iter + 1 - log(log(abs(z)))/log(2)
-                return iter
-        return self.max_iterations
+from mandelbrot_engine import (MandelbrotSet, complex_grid, grayscale, row_costs,
+                               balanced_partition, PREVIEW_STEP, BACKENDS)
+from mpi_trace import Tracer
+
+parser = argparse.ArgumentParser(description="Mandelbrot partition par blocs")
+parser.add_argument('--partition', choices=['even', 'cost'], default='even',
+                    help='Répartition des lignes : égale ou selon un modèle de coût')
+parser.add_argument('--backend', choices=BACKENDS, default='numpy',
+                    help='Implémentation du calcul : boucle python, numpy vectorisé ou numba')
+parser.add_argument('--trace', default=None, metavar='FICHIER',
+                    help="Trace d'exécution par processus (JSON, ui.perfetto.dev)")
+parser.add_argument('--width', type=int, default=1024)
+parser.add_argument('--height', type=int, default=1024)
+parser.add_argument('--max-iterations', type=int, default=50)
+args = parser.parse_args()
 
 # Initialisation MPI
 comm = MPI.COMM_WORLD
 rank = comm.Get_rank()
 size = comm.Get_size()
+tracer = Tracer(comm, enabled=args.trace is not None)
 
 # Paramètres
-mandelbrot_set = MandelbrotSet(max_iterations=50, escape_radius=10)
-width, height = 1024, 1024
+mandelbrot_set = MandelbrotSet(max_iterations=args.max_iterations, escape_radius=10,
+                               backend=args.backend)
+width, height = args.width, args.height
 scaleX = 3./width
 scaleY = 2.25/height
 
-# Calcul de la répartition des lignes (gestion du reste)
-rows_per_process = height // size
-remainder = height % size
-
-if rank < remainder:
-    local_height = rows_per_process + 1
-    start_y = rank * local_height
+# Calcul de la répartition des lignes : row_counts[i] lignes pour le processus i
+row_counts = np.empty(size, dtype=np.int64)
+if args.partition == 'cost':
+    # Aperçu basse résolution sur le processus 0, puis diffusion du découpage
+    if rank == 0:
+        deb_preview = time()
+        costs = row_costs(mandelbrot_set, width, height, scaleX, scaleY)
+        t_preview = time() - deb_preview
+        row_counts[:] = balanced_partition(costs, size)
+    with tracer.span('collective', 'Bcast'):
+        comm.Bcast(row_counts, root=0)
 else:
-    local_height = rows_per_process
-    start_y = remainder * (rows_per_process + 1) + (rank - remainder) * rows_per_process
-
+    # Gestion du reste : une ligne de plus pour les premiers processus
+    rows_per_process = height // size
+    remainder = height % size
+    row_counts[:] = [rows_per_process + 1 if i < remainder else rows_per_process
+                     for i in range(size)]
+
+local_height = int(row_counts[rank])
+start_y = int(np.sum(row_counts[:rank]))
 end_y = start_y + local_height
 
 # Affichage de la répartition
 print(f"Processus {rank}/{size}: lignes {start_y} à {end_y-1} ({local_height} lignes)")
 
-# Calcul local
-local_convergence = np.empty((width, local_height), dtype=np.double)
+# Calcul local, directement dans un tableau (lignes, width) contigu
+local_convergence = np.empty((local_height, width), dtype=np.double)
 
 deb = time()
-for y_local in range(local_height):
-    y = start_y + y_local
-    for x in range(width):
-        c = complex(-2. + scaleX*x, -1.125 + scaleY * y)
-        local_convergence[x, y_local] = mandelbrot_set.convergence(c, smooth=True)
+with tracer.span('compute'):
+    c = complex_grid(range(start_y, end_y), width, scaleX, scaleY)
+    mandelbrot_set.convergence_tile(c, smooth=True, out=local_convergence)
 fin = time()
 
 local_time = fin - deb
 print(f"Processus {rank}: temps de calcul local = {local_time:.4f}s")
 
-# Rassemblement avec Gatherv (tailles différentes possibles)
-# Transposer pour avoir des données contiguës
-local_convergence_T = local_convergence.T.copy()
-
+# Rassemblement avec Gatherv (tailles différentes possibles) :
+# les blocs de lignes sont reçus directement à leur place dans l'image finale
 if rank == 0:
-    recvbuf_T = np.empty((height, width), dtype=np.double)
-    counts = np.array([rows_per_process + 1 if i < remainder else rows_per_process 
-                       for i in range(size)]) * width
+    convergence = np.empty((height, width), dtype=np.double)
+    counts = row_counts * width
     displacements = np.array([0] + list(np.cumsum(counts)[:-1]))
 else:
-    recvbuf_T = None
+    convergence = None
     counts = None
     displacements = None
 
-comm.Gatherv(sendbuf=local_convergence_T, 
-             recvbuf=[recvbuf_T, counts, displacements, MPI.DOUBLE], 
-             root=0)
+with tracer.span('collective', 'Gatherv'):
+    comm.Gatherv(sendbuf=local_convergence,
+                 recvbuf=[convergence, counts, displacements, MPI.DOUBLE],
+                 root=0)
 
 # Collecte du temps maximum
 max_time = comm.reduce(local_time, op=MPI.MAX, root=0)
+all_times = comm.gather(local_time, root=0)
 
 if rank == 0:
-    final_convergence = recvbuf_T.T
-    
-    print(f"\n=== Résultats ({size} processus) ===")
+    print(f"\n=== Résultats ({size} processus, partition {args.partition}) ===")
     print(f"Temps de calcul maximum: {max_time:.4f}s")
+    print("BENCH:" + json.dumps({"time": max_time, "local_times": all_times}))
+    if args.partition == 'cost':
+        # Temps prédit : temps de l'aperçu extrapolé (x PREVIEW_STEP²) au prorata du coût
+        bounds = np.concatenate(([0], np.cumsum(row_counts)))
+        predicted = [t_preview * PREVIEW_STEP**2 * costs[bounds[i]:bounds[i+1]].sum() / costs.sum()
+                     for i in range(size)]
+        print(f"Temps de l'aperçu: {t_preview:.4f}s")
+        for i in range(size):
+            print(f"  P{i}: lignes {bounds[i]}-{bounds[i+1]-1}, "
+                  f"prédit {predicted[i]:.4f}s, mesuré {all_times[i]:.4f}s")
     
     # Création de l'image
     deb_img = time()
-    image = Image.fromarray(np.uint8(final_convergence.T * 255))
+    image = Image.fromarray(grayscale(convergence))
     fin_img = time()
     print(f"Temps de constitution de l'image: {fin_img-deb_img:.4f}s")
     image.save(f"mandelbrot_block_{size}p.png")
     print(f"Image sauvegardée: mandelbrot_block_{size}p.png")
+
+tracer.save(args.trace, f"mandelbrot_block ({size} processus)")
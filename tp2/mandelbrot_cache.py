@@ -0,0 +1,120 @@
+"""
+Cache de tuiles pour les rendus répétés de l'ensemble de Mandelbrot
+(déplacements et zooms sur une même région, mêmes paramètres)
+
+Le plan est découpé en tuiles de TILE_SIZE x TILE_SIZE pixels sur une grille globale :
+le pixel d'indices (gx, gy) est le point c = origin + scaleX*gx + i*scaleY*gy. Une vue
+dont le coin (x_min, y_min) tombe exactement sur cette grille réutilise toutes les
+tuiles déjà calculées à la même résolution, même si elle est décalée d'un nombre
+quelconque de pixels (les tuiles du bord sont calculées en entier puis découpées).
+
+    TileCache     : LRU en mémoire limité en octets, éventuellement doublé d'un stockage
+                    sur disque (un fichier .npy par tuile), avec statistiques
+    render_cached : calcul d'une vue (height, width) à partir des tuiles du cache
+"""
+import numpy as np
+import hashlib
+import os
+from collections import OrderedDict
+from mandelbrot_engine import MandelbrotSet, complex_grid
+
+# Côté (en pixels) des tuiles du cache
+TILE_SIZE = 64
+# Tolérance (en pixels) pour considérer qu'une vue est alignée sur la grille des tuiles
+ALIGN_TOLERANCE = 1.E-6
+
+
+class TileCache:
+    """
+    Tuiles de convergence indexées par (résolution, position sur la grille, paramètres
+    du calcul, backend compris). Les tuiles les moins récemment utilisées sont retirées de la mémoire
+    au-delà de max_bytes ; si `directory` est donné, toute tuile calculée y est aussi
+    enregistrée et peut y être relue après éviction (ou lors d'une exécution suivante).
+    """
+    def __init__(self, max_bytes: int, directory: str | None = None,
+                 origin: tuple = (-2., -1.125)):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.origin = origin
+        self.tiles = OrderedDict()
+        self.nbytes = 0
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key) -> str:
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode()).hexdigest() + '.npy')
+
+    def get(self, key):
+        """Tuile associée à key (None si absente), en mémoire puis sur disque"""
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+        if self.directory is not None and os.path.exists(self._path(key)):
+            tile = np.load(self._path(key))
+            self.disk_hits += 1
+            self._insert(key, tile)
+            return tile
+        self.misses += 1
+        return None
+
+    def put(self, key, tile: np.ndarray) -> None:
+        """Ajoute une tuile calculée (et l'enregistre sur disque si besoin)"""
+        if self.directory is not None:
+            np.save(self._path(key), tile)
+        self._insert(key, tile)
+
+    def _insert(self, key, tile: np.ndarray) -> None:
+        self.tiles[key] = tile
+        self.nbytes += tile.nbytes
+        while self.nbytes > self.max_bytes and len(self.tiles) > 1:
+            _, old = self.tiles.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+
+    def stats(self) -> str:
+        requests = self.hits + self.disk_hits + self.misses
+        hit_rate = 100*(self.hits + self.disk_hits)/max(requests, 1)
+        return (f"{self.hits} succès mémoire, {self.disk_hits} succès disque, "
+                f"{self.misses} échecs ({hit_rate:.1f}% de succès), {self.evictions} évictions, "
+                f"{len(self.tiles)} tuiles ({self.nbytes/2**20:.1f} Mo) en mémoire")
+
+
+def render_cached(mandelbrot_set: MandelbrotSet, cache: TileCache, width: int, height: int,
+                  scaleX: float, scaleY: float, x_min: float = -2., y_min: float = -1.125,
+                  smooth=False, out=None) -> np.ndarray:
+    """
+    Convergence (normalisée, bornée à [0, 1]) de la vue (height, width) de coin (x_min, y_min),
+    assemblée à partir des tuiles du cache. Une vue non alignée sur la grille des tuiles
+    est calculée directement, sans passer par le cache.
+    """
+    if out is None:
+        out = np.empty((height, width), dtype=np.double)
+    origin_x, origin_y = cache.origin
+    gx0, gy0 = (x_min - origin_x)/scaleX, (y_min - origin_y)/scaleY
+    if abs(gx0 - round(gx0)) > ALIGN_TOLERANCE or abs(gy0 - round(gy0)) > ALIGN_TOLERANCE:
+        c = complex_grid(range(height), width, scaleX, scaleY, x_min, y_min)
+        return mandelbrot_set.convergence_tile(c, smooth, out=out)
+    gx0, gy0 = round(gx0), round(gy0)
+    # Tous les paramètres dont dépend le résultat (la détection de cycle et le backend
+    # aussi : une tuile n'est réutilisée que pour un calcul identique)
+    params = (scaleX, scaleY, mandelbrot_set.max_iterations, mandelbrot_set.escape_radius,
+              mandelbrot_set.cycle_tolerance, mandelbrot_set.backend, bool(smooth))
+    for ty in range(gy0 // TILE_SIZE, -(-(gy0 + height) // TILE_SIZE)):
+        for tx in range(gx0 // TILE_SIZE, -(-(gx0 + width) // TILE_SIZE)):
+            key = (origin_x, origin_y, tx, ty, TILE_SIZE) + params
+            tile = cache.get(key)
+            if tile is None:
+                c = complex_grid(range(ty*TILE_SIZE, (ty + 1)*TILE_SIZE), TILE_SIZE,
+                                 scaleX, scaleY, origin_x, origin_y,
+                                 columns=range(tx*TILE_SIZE, (tx + 1)*TILE_SIZE))
+                tile = mandelbrot_set.convergence_tile(c, smooth)
+                cache.put(key, tile)
+            # Partie de la tuile visible dans la vue
+            y0, y1 = max(ty*TILE_SIZE, gy0), min((ty + 1)*TILE_SIZE, gy0 + height)
+            x0, x1 = max(tx*TILE_SIZE, gx0), min((tx + 1)*TILE_SIZE, gx0 + width)
+            out[y0 - gy0:y1 - gy0, x0 - gx0:x1 - gx0] = \
+                tile[y0 - ty*TILE_SIZE:y1 - ty*TILE_SIZE, x0 - tx*TILE_SIZE:x1 - tx*TILE_SIZE]
+    return out
@@ -0,0 +1,65 @@
+# Zoom profond dans l'ensemble de Mandelbrot (théorie des perturbations)
+# Le centre et la largeur de la vue sont donnés en texte, avec autant de chiffres que
+# nécessaire : seule l'orbite de référence est calculée en précision arbitraire
+import numpy as np
+import argparse
+from decimal import Decimal
+from PIL import Image
+from time import time
+from mandelbrot_engine import MandelbrotSet, grayscale
+from mandelbrot_perturbation import (precision_digits, reference_orbit,
+                                     series_approximation, perturbation_tile)
+
+parser = argparse.ArgumentParser(description="Zoom profond dans l'ensemble de Mandelbrot")
+# Centre par défaut : c = i, point de Misiurewicz (bord de l'ensemble, structure
+# ramifiée à toutes les échelles)
+parser.add_argument('--center-x', default='0', help='Partie réelle du centre de la vue')
+parser.add_argument('--center-y', default='1', help='Partie imaginaire du centre de la vue')
+parser.add_argument('--span', default='1e-30', help='Largeur de la vue')
+parser.add_argument('--max-iterations', type=int, default=2000)
+parser.add_argument('--width', type=int, default=1024)
+parser.add_argument('--height', type=int, default=1024)
+parser.add_argument('--no-series', action='store_true',
+                    help="Ne pas sauter d'itérations par approximation par série")
+args = parser.parse_args()
+
+mandelbrot_set = MandelbrotSet(max_iterations=args.max_iterations, escape_radius=10)
+width, height = args.width, args.height
+scale = float(Decimal(args.span)/width)
+
+# Orbite de référence au centre de la vue
+deb = time()
+digits = precision_digits(args.span)
+orbit = reference_orbit(args.center_x, args.center_y, mandelbrot_set.max_iterations,
+                        mandelbrot_set.escape_radius, digits)
+fin = time()
+print(f"Orbite de référence ({digits} chiffres, {orbit.size-1} itérations) : {fin-deb:.4f}s")
+
+# Écarts dc des pixels au centre (en double précision)
+dx = scale*(np.arange(width, dtype=np.double) - width/2)
+dy = scale*(np.arange(height, dtype=np.double) - height/2)
+dc = dx[np.newaxis, :] + 1j*dy[:, np.newaxis]
+
+series = (0, 0j, 0j, 0j)
+if not args.no_series:
+    series = series_approximation(orbit, float(np.abs(dc).max()), mandelbrot_set.escape_radius)
+print(f"Itérations sautées par approximation par série : {series[0]}")
+
+# Calcul des pixels par perturbation
+deb = time()
+convergence, nb_rebased = perturbation_tile(mandelbrot_set, orbit, dc, smooth=True,
+                                            series=series)
+# En zoom profond tous les pixels font beaucoup d'itérations : l'échelle de gris
+# couvre les nombres d'itérations des pixels divergents de la vue
+escaped = convergence[convergence < mandelbrot_set.max_iterations]
+start, stop = (escaped.min(), escaped.max()) if escaped.size else (0., 1.)
+convergence -= start
+convergence /= max(stop - start, 1.E-12)
+np.clip(convergence, 0.0, 1.0, out=convergence)
+fin = time()
+print(f"Temps du calcul de l'ensemble de Mandelbrot : {fin-deb:.4f}s")
+print(f"Rebasages (glitches évités) : {nb_rebased}")
+
+image = Image.fromarray(grayscale(convergence))
+image.save("mandelbrot_deep.png")
+print("Image sauvegardée: mandelbrot_deep.png")
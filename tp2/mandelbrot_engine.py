@@ -0,0 +1,458 @@
+"""
+Moteur de calcul commun de l'ensemble de Mandelbrot
+Calcul vectorisé (NumPy) d'une tuile 2-D complète au lieu d'une boucle par pixel
+
+Utilisé par mandelbrot.py, mandelbrot_vec.py et toutes les variantes MPI du TP2
+"""
+import numpy as np
+from dataclasses import dataclass, field
+from math import log, sqrt
+
+LOG2 = log(2)
+# Fréquence (en itérations) du compactage des points actifs
+COMPACT_EVERY = 8
+# Implémentations disponibles de count_iterations_tile
+BACKENDS = ('python', 'numpy', 'numba')
+# Taille en dessous de laquelle Mariani-Silver ne subdivise plus un rectangle
+MARIANI_MIN_SIZE = 16
+# Sous-échantillonnage (lignes et colonnes) de l'aperçu servant à estimer les coûts
+PREVIEW_STEP = 4
+# Lignes traitées à la fois par apply_colormap
+COLOR_CHUNK_ROWS = 256
+# Pas des passes successives du rendu progressif (1/64, 1/16, 1/4 puis tous les pixels)
+PROGRESSIVE_STRIDES = (8, 4, 2, 1)
+# Taille minimale (en pixels) d'un groupe de passes du rendu progressif : les passes plus
+# petites sont calculées avec les suivantes (coût fixe de la boucle d'itérations)
+PROGRESSIVE_MIN_PIXELS = 1 << 16
+
+
+def smooth_count(iter, modulus2):
+    """
+    Nombre d'itérations lissé d'un point sorti à l'itération iter avec |z|² = modulus2 :
+    iter + 1 - log2(log|z|). np.log pour la version scalaire comme pour les tuiles
+    (math.log et np.log peuvent différer au dernier bit)
+    """
+    return iter + 1 - np.log(0.5*np.log(modulus2))/LOG2
+
+
+def grayscale(convergence: np.ndarray, out=None) -> np.ndarray:
+    """
+    Image en niveaux de gris (uint8) d'un tableau de convergence dans [0, 1] :
+    équivalent de np.uint8(convergence*255) sans tableau flottant intermédiaire
+    """
+    if out is None:
+        out = np.empty(convergence.shape, dtype=np.uint8)
+    np.multiply(convergence, 255, out=out, casting='unsafe')
+    return out
+
+
+def colormap_lut(name: str = 'plasma', size: int = 256) -> np.ndarray:
+    """
+    Table de couleurs (size, 3) uint8 échantillonnée une fois pour toutes dans la
+    palette matplotlib `name` (256 ou 4096 entrées typiquement)
+    """
+    import matplotlib
+    cmap = matplotlib.colormaps[name]
+    return np.uint8(cmap(np.linspace(0., 1., size))[:, :3]*255)
+
+
+def apply_colormap(convergence: np.ndarray, lut: np.ndarray, out=None,
+                   chunk_rows: int = COLOR_CHUNK_ROWS) -> np.ndarray:
+    """
+    Image RGB uint8 (lignes, width, 3) d'un tableau de convergence dans [0, 1] :
+    même résultat que np.uint8(matplotlib.cm.<name>(convergence)*255)[..., :3] pour une
+    table de 256 entrées, sans tableau RGBA flottant. Les indices dans la table sont
+    calculés par paquets de chunk_rows lignes (np.take) pour borner la mémoire.
+    """
+    if out is None:
+        out = np.empty(convergence.shape + (3,), dtype=np.uint8)
+    size = lut.shape[0]
+    for y in range(0, convergence.shape[0], chunk_rows):
+        band = convergence[y:y + chunk_rows]
+        index = np.empty(band.shape, dtype=np.intp)
+        np.multiply(band, size, out=index, casting='unsafe')
+        np.minimum(index, size - 1, out=index)
+        np.take(lut, index, axis=0, out=out[y:y + chunk_rows])
+    return out
+
+
+def complex_grid(rows, width: int, scaleX: float, scaleY: float,
+                 x_min: float = -2., y_min: float = -1.125, columns=None) -> np.ndarray:
+    """
+    Points c = x_min + scaleX*x + i*(y_min + scaleY*y) des lignes `rows`
+    (range, liste ou tableau d'indices) : tableau complexe (len(rows), width).
+    Si `columns` est donné, seules ces colonnes sont générées (width est alors ignoré)
+    """
+    if columns is None:
+        columns = range(width)
+    x = x_min + scaleX * np.asarray(columns, dtype=np.double)
+    y = y_min + scaleY * np.asarray(rows, dtype=np.double)
+    return x[np.newaxis, :] + 1.j * y[:, np.newaxis]
+
+
+@dataclass
+class MandelbrotSet:
+    max_iterations: int
+    escape_radius:  float = 2.0
+    # Détection de cycle (Brent) : |z - z_ref| < cycle_tolerance => point intérieur
+    # (0 désactive la détection)
+    cycle_tolerance: float = 1.E-10
+    # Implémentation des calculs par tuile : 'python' (boucle sur les pixels),
+    # 'numpy' (vectorisé) ou 'numba' (compilé, multi-thread, module mandelbrot_numba)
+    backend: str = 'numpy'
+    # Nombre de points sortis prématurément grâce à la détection de cycle
+    nb_periodic: int = field(default=0, init=False, compare=False)
+
+    def __post_init__(self):
+        if self.backend not in BACKENDS:
+            raise ValueError(f"backend inconnu : {self.backend} (choix : {', '.join(BACKENDS)})")
+
+    def __contains__(self, c: complex) -> bool:
+        return self.count_iterations(c) == self.max_iterations
+
+    # ------------------------------------------------------------------
+    # Version scalaire (un seul point c)
+    # ------------------------------------------------------------------
+    def convergence(self, c: complex, smooth=False, clamp=True) -> float:
+        value = self.count_iterations(c, smooth)/self.max_iterations
+        return max(0.0, min(value, 1.0)) if clamp else value
+
+    def count_iterations(self, c: complex,  smooth=False) -> int | float:
+        z:    complex
+        iter: int
+
+        # On vérifie dans un premier temps si le complexe
+        # n'appartient pas à une zone de convergence connue :
+        #   1. Appartenance aux disques  C0{(0,0),1/4} et C1{(-1,0),1/4}
+        if c.real*c.real+c.imag*c.imag < 0.0625:
+            return self.max_iterations
+        if (c.real+1)*(c.real+1)+c.imag*c.imag < 0.0625:
+            return self.max_iterations
+        #  2.  Appartenance à la cardioïde {(1/4,0),1/2(1-cos(theta))}
+        if (c.real > -0.75) and (c.real < 0.5):
+            ctr = c.real - 0.25
+            ctnrm2 = sqrt(ctr*ctr + c.imag*c.imag)
+            if ctnrm2 < 0.5*(1-ctr/max(ctnrm2, 1.E-14)):
+                return self.max_iterations
+        # Sinon on itère, en comparant z à un point de référence de l'orbite
+        # mis à jour aux itérations 1, 2, 4, 8, ... (algorithme de Brent).
+        # Parties réelle et imaginaire séparées, modules au carré, opérations dans le
+        # même ordre que count_iterations_tile : les deux versions donnent le même résultat
+        cr, ci = c.real, c.imag
+        escape_radius2 = self.escape_radius*self.escape_radius
+        cycle_tolerance2 = self.cycle_tolerance*self.cycle_tolerance
+        zr = zi = zr2 = zi2 = 0.
+        zr_ref = zi_ref = 0.
+        period, lam = 1, 0
+        for iter in range(self.max_iterations):
+            zi = 2*(zr*zi) + ci
+            zr = (zr2 - zi2) + cr
+            zr2, zi2 = zr*zr, zi*zi
+            modulus2 = zr2 + zi2
+            if modulus2 > escape_radius2:
+                if smooth:
+                    return smooth_count(iter, modulus2)
+                return iter
+            dr, di = zr - zr_ref, zi - zi_ref
+            if dr*dr + di*di < cycle_tolerance2:
+                self.nb_periodic += 1
+                return self.max_iterations
+            lam += 1
+            if lam == period:
+                zr_ref, zi_ref = zr, zi
+                period, lam = 2*period, 0
+        return self.max_iterations
+
+    # ------------------------------------------------------------------
+    # Version vectorisée (tuile 2-D de points c)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def interior_mask(c: np.ndarray) -> np.ndarray:
+        """
+        Masque des points appartenant à une zone de convergence connue
+        (disques C0, C1 et cardioïde principale) : mêmes tests que la version scalaire
+        """
+        cr, ci = c.real, c.imag
+        ci2 = ci*ci
+        mask = cr*cr + ci2 < 0.0625
+        mask |= (cr+1)*(cr+1) + ci2 < 0.0625
+        ctr = cr - 0.25
+        ctnrm2 = np.sqrt(ctr*ctr + ci2)
+        mask |= ((cr > -0.75) & (cr < 0.5)
+                 & (ctnrm2 < 0.5*(1 - ctr/np.maximum(ctnrm2, 1.E-14))))
+        return mask
+
+    def count_iterations_tile(self, c: np.ndarray, smooth=False, out=None,
+                              compact_every: int = COMPACT_EVERY) -> np.ndarray:
+        """
+        Nombre d'itérations (éventuellement lissé) pour toute une tuile de points c.
+        Seuls les points actifs sont itérés, dans des tampons contigus : toutes les
+        `compact_every` itérations, les points ayant divergé en sont retirés.
+        La détection de cycle n'est faite qu'à ces mêmes itérations : la référence
+        est prise aux itérations compact_every*2^k, un cycle de période p est donc
+        détecté dès que l'écart à la référence atteint un multiple de ppcm(p, compact_every).
+        """
+        c = np.ascontiguousarray(c, dtype=np.complex128)
+        if out is None:
+            out = np.empty(c.shape, dtype=np.double)
+        flat_out = out.reshape(-1)
+        flat_c = c.reshape(-1)
+        if self.backend == 'numba':
+            from mandelbrot_numba import count_iterations
+            self.nb_periodic += count_iterations(flat_c, self.max_iterations,
+                                                 float(self.escape_radius), smooth,
+                                                 float(self.cycle_tolerance), flat_out)
+            return out
+        if self.backend == 'python':
+            for k in range(flat_c.size):
+                flat_out[k] = self.count_iterations(complex(flat_c[k]), smooth)
+            return out
+        out.fill(self.max_iterations)
+
+        active = np.flatnonzero(~self.interior_mask(flat_c))
+        # Parties réelle et imaginaire séparées (mêmes opérations, dans le même ordre, que
+        # count_iterations) : le produit complexe de numpy peut être arrondi autrement
+        cr, ci = flat_c.real[active], flat_c.imag[active]
+        zr, zi = np.zeros(active.size), np.zeros(active.size)
+        zr2, zi2 = np.zeros(active.size), np.zeros(active.size)
+        modulus2 = np.empty(active.size, dtype=np.double)
+        escaped = np.empty(active.size, dtype=bool)
+        # Modules comparés au carré : pas de racine carrée par point et par itération
+        escape_radius2 = self.escape_radius*self.escape_radius
+        cycle_tolerance2 = self.cycle_tolerance*self.cycle_tolerance
+        nb_escaped = 0
+        check_cycles = self.cycle_tolerance > 0
+        z_ref, next_ref = None, compact_every
+        # Un point qui diverge (ou dont l'orbite est périodique) reçoit c = nan : il reste
+        # dans les tampons jusqu'au prochain compactage mais ne peut plus être détecté
+        with np.errstate(over='ignore', invalid='ignore'):
+            for iter in range(self.max_iterations):
+                if active.size == 0:
+                    break
+                # z = z² + c
+                np.multiply(zr, zi, out=zi)
+                np.add(zi, zi, out=zi)
+                np.add(zi, ci, out=zi)
+                np.subtract(zr2, zi2, out=zr)
+                np.add(zr, cr, out=zr)
+                np.multiply(zr, zr, out=zr2)
+                np.multiply(zi, zi, out=zi2)
+                np.add(zr2, zi2, out=modulus2)
+                np.greater(modulus2, escape_radius2, out=escaped)
+                if escaped.any():
+                    idx = active[escaped]
+                    if smooth:
+                        flat_out[idx] = smooth_count(iter, modulus2[escaped])
+                    else:
+                        flat_out[idx] = iter
+                    cr[escaped] = np.nan
+                    nb_escaped += idx.size
+                if (iter + 1) % compact_every != 0:
+                    continue
+                if check_cycles and z_ref is not None:
+                    dr, di = zr - z_ref[0], zi - z_ref[1]
+                    np.multiply(dr, dr, out=dr)
+                    np.multiply(di, di, out=di)
+                    np.add(dr, di, out=modulus2)
+                    periodic = modulus2 < cycle_tolerance2
+                    nb_periodic = np.count_nonzero(periodic)
+                    if nb_periodic > 0:
+                        cr[periodic] = np.nan
+                        nb_escaped += nb_periodic
+                        self.nb_periodic += nb_periodic
+                if nb_escaped > 0:
+                    alive = ~np.isnan(cr)
+                    active, cr, ci = active[alive], cr[alive], ci[alive]
+                    zr, zi, zr2, zi2 = zr[alive], zi[alive], zr2[alive], zi2[alive]
+                    if z_ref is not None:
+                        z_ref = (z_ref[0][alive], z_ref[1][alive])
+                    modulus2 = np.empty(active.size, dtype=np.double)
+                    escaped = np.empty(active.size, dtype=bool)
+                    nb_escaped = 0
+                if check_cycles and iter + 1 == next_ref:
+                    z_ref = (zr.copy(), zi.copy())
+                    next_ref *= 2
+        return out
+
+    def convergence_tile(self, c: np.ndarray, smooth=False, clamp=True, out=None) -> np.ndarray:
+        """Équivalent vectorisé de convergence() : le résultat est normalisé en place"""
+        value = self.count_iterations_tile(c, smooth, out)
+        value /= self.max_iterations
+        if clamp:
+            np.clip(value, 0.0, 1.0, out=value)
+        return value
+
+
+def row_costs(mandelbrot_set: MandelbrotSet, width: int, height: int,
+              scaleX: float, scaleY: float, step: int = PREVIEW_STEP,
+              x_min: float = -2., y_min: float = -1.125) -> np.ndarray:
+    """
+    Coût estimé de chacune des `height` lignes de l'image, à partir d'un aperçu
+    basse résolution (une ligne et une colonne sur `step`, soit 1/step² des pixels).
+    Le coût d'un pixel est son nombre d'itérations (+1), ou 1 s'il est rejeté
+    d'emblée (disques, cardioïde). Une ligne hérite du coût de la ligne d'aperçu
+    la plus proche au-dessus.
+    """
+    c = complex_grid(range(0, height, step), -(-width // step), step*scaleX, scaleY,
+                     x_min, y_min)
+    cost = mandelbrot_set.count_iterations_tile(c) + 1
+    cost[MandelbrotSet.interior_mask(c)] = 1
+    return np.repeat(cost.sum(axis=1)*step, step)[:height]
+
+
+def balanced_partition(costs: np.ndarray, nb_parts: int) -> np.ndarray:
+    """
+    Découpage des lignes en `nb_parts` intervalles contigus de coûts cumulés égaux :
+    renvoie le nombre de lignes de chaque partie (utilisable tel quel, multiplié par
+    width, comme `counts` d'un Gatherv). Une ligne va à la partie qui contient son milieu.
+    """
+    cumulative = np.cumsum(costs, dtype=np.double)
+    middles = cumulative - 0.5*costs
+    targets = cumulative[-1] * np.arange(1, nb_parts) / nb_parts
+    bounds = np.concatenate(([0], np.searchsorted(middles, targets), [len(costs)]))
+    return np.diff(bounds)
+
+
+def progressive_subgrids(strides, index: int, y_start: int, y_end: int, width: int) -> list:
+    """
+    Pixels des lignes [y_start, y_end) calculés par la passe `index` d'un rendu progressif
+    de pas `strides` (chaque pas est la moitié du précédent) : la passe de pas s calcule
+    les pixels de lignes et colonnes multiples de s qui n'appartiennent pas à la grille
+    de la passe précédente. Renvoie une liste de sous-grilles régulières
+    (range des lignes, range des colonnes), sans les sous-grilles vides.
+    """
+    def rows(first, step):
+        return range(y_start + (first - y_start) % step, y_end, step)
+    s = strides[index]
+    if index == 0:
+        subgrids = [(rows(0, s), range(0, width, s))]
+    else:
+        assert strides[index-1] == 2*s, "chaque pas doit être la moitié du précédent"
+        subgrids = [(rows(0, 2*s), range(s, width, 2*s)), (rows(s, 2*s), range(0, width, s))]
+    return [(r, c) for r, c in subgrids if len(r) > 0 and len(c) > 0]
+
+
+def progressive_batches(strides, width: int, height: int,
+                        min_pixels: int = PROGRESSIVE_MIN_PIXELS) -> list:
+    """
+    Passes successives d'un rendu progressif regroupées (listes d'indices de passes)
+    pour que chaque groupe, calculé en un seul appel, compte au moins min_pixels pixels :
+    une petite image est calculée en une seule fois, une grande garde ses aperçus
+    """
+    batches, current, size = [], [], 0
+    for index in range(len(strides)):
+        current.append(index)
+        size += subgrids_size(progressive_subgrids(strides, index, 0, height, width))
+        if size >= min_pixels:
+            batches.append(current)
+            current, size = [], 0
+    if current:
+        batches.append(current)
+    return batches
+
+
+def subgrids_size(subgrids: list) -> int:
+    """Nombre total de pixels d'une liste de sous-grilles"""
+    return sum(len(r)*len(c) for r, c in subgrids)
+
+
+def convergence_subgrids(mandelbrot_set: MandelbrotSet, subgrids: list, scaleX: float,
+                         scaleY: float, smooth=False, out=None,
+                         x_min: float = -2., y_min: float = -1.125) -> np.ndarray:
+    """
+    Convergence des pixels des sous-grilles, mises bout à bout dans un tableau 1-D
+    (ou dans out, tableau contigu de subgrids_size(subgrids) éléments).
+    Toutes les sous-grilles sont calculées en un seul appel à convergence_tile : le coût
+    fixe de la boucle d'itérations n'est payé qu'une fois, même pour les petites passes
+    """
+    if out is None:
+        out = np.empty(subgrids_size(subgrids), dtype=np.double)
+    c = np.empty(subgrids_size(subgrids), dtype=np.complex128)
+    offset = 0
+    for r, cols in subgrids:
+        n = len(r)*len(cols)
+        c[offset:offset+n] = complex_grid(r, len(cols), scaleX, scaleY, x_min, y_min,
+                                          columns=cols).reshape(-1)
+        offset += n
+    mandelbrot_set.convergence_tile(c, smooth, out=out.reshape(-1))
+    return out
+
+
+def scatter_subgrids(image: np.ndarray, subgrids: list, values: np.ndarray) -> None:
+    """Range dans l'image (height, width) les valeurs calculées par convergence_subgrids"""
+    offset = 0
+    for r, c in subgrids:
+        n = len(r)*len(c)
+        image[r.start:r.stop:r.step, c.start:c.stop:c.step] = \
+            values[offset:offset+n].reshape(len(r), len(c))
+        offset += n
+
+
+def _uniform_border(values: np.ndarray, y0: int, y1: int, x0: int, x1: int) -> bool:
+    """Vrai si tous les pixels du bord du rectangle [y0, y1) x [x0, x1) sont égaux"""
+    v = values[y0, x0]
+    return bool((values[y0, x0:x1] == v).all() and (values[y1-1, x0:x1] == v).all()
+                and (values[y0:y1, x0] == v).all() and (values[y0:y1, x1-1] == v).all())
+
+
+def mariani_silver(mandelbrot_set: MandelbrotSet, y_start: int, y_end: int, width: int,
+                   scaleX: float, scaleY: float, smooth=False, clamp=True,
+                   min_size: int = MARIANI_MIN_SIZE, x_min: float = -2., y_min: float = -1.125):
+    """
+    Rendu des lignes [y_start, y_end) par subdivision de rectangles (Mariani-Silver) :
+    seul le bord d'un rectangle est calculé ; s'il est uniforme, l'intérieur est
+    rempli avec cette valeur, sinon le rectangle est découpé en quatre. En dessous
+    de `min_size` pixels de côté, l'intérieur est calculé directement.
+    Les pixels à calculer d'un même niveau de subdivision (bords des nouveaux
+    rectangles et intérieurs des petits rectangles du niveau précédent) sont
+    regroupés en un seul appel à count_iterations_tile.
+    Retourne (convergence (y_end-y_start, width), nb pixels calculés, nb pixels remplis)
+    """
+    height = y_end - y_start
+    x = x_min + scaleX * np.arange(width, dtype=np.double)
+    y = y_min + scaleY * np.arange(y_start, y_end, dtype=np.double)
+    values = np.empty((height, width), dtype=np.double)
+    known = np.zeros((height, width), dtype=bool)
+    requested = np.zeros((height, width), dtype=bool)
+    nb_evaluated = nb_filled = 0
+
+    def evaluate():
+        nonlocal nb_evaluated
+        requested[known] = False
+        indices = np.flatnonzero(requested)
+        if indices.size > 0:
+            c = x[indices % width] + 1.j * y[indices // width]
+            values.reshape(-1)[indices] = mandelbrot_set.count_iterations_tile(c, smooth)
+            known.reshape(-1)[indices] = True
+            nb_evaluated += indices.size
+        requested[:] = False
+
+    pending = [(0, height, 0, width)]
+    while pending:
+        for y0, y1, x0, x1 in pending:
+            requested[(y0, y1-1), x0:x1] = True
+            requested[y0:y1, (x0, x1-1)] = True
+        evaluate()
+        next_pending = []
+        for y0, y1, x0, x1 in pending:
+            if y1 - y0 <= 2 or x1 - x0 <= 2:
+                continue
+            if _uniform_border(values, y0, y1, x0, x1):
+                inner = ~known[y0+1:y1-1, x0+1:x1-1]
+                values[y0+1:y1-1, x0+1:x1-1][inner] = values[y0, x0]
+                known[y0+1:y1-1, x0+1:x1-1] = True
+                nb_filled += np.count_nonzero(inner)
+            elif y1 - y0 <= min_size or x1 - x0 <= min_size:
+                requested[y0+1:y1-1, x0+1:x1-1] = True
+            else:
+                ym, xm = (y0 + y1)//2, (x0 + x1)//2
+                next_pending += [(y0, ym+1, x0, xm+1), (y0, ym+1, xm, x1),
+                                 (ym, y1, x0, xm+1), (ym, y1, xm, x1)]
+        pending = next_pending
+    # Intérieurs des petits rectangles demandés au dernier niveau
+    evaluate()
+
+    values /= mandelbrot_set.max_iterations
+    if clamp:
+        np.clip(values, 0.0, 1.0, out=values)
+    return values, nb_evaluated, nb_filled
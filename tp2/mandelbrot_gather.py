@@ -0,0 +1,76 @@
+"""
+Rassemblement sur le processus racine des lignes d'une répartition cyclique
+(le processus r possède les lignes r, r+size, r+2*size, ...)
+
+    gather_cyclic            : chaque bloc de lignes est reçu directement à sa place
+                               dans l'image grâce à un type dérivé MPI (vecteur strié)
+    gather_cyclic_reassemble : ancienne méthode (Gatherv des indices et des données,
+                               puis reconstruction ligne par ligne), pour comparaison
+"""
+from mpi4py import MPI
+import numpy as np
+
+TAG_CYCLIC = 10
+
+
+def gather_cyclic(comm, local_data: np.ndarray, height: int, root: int = 0):
+    """
+    Rassemble les lignes locales (tableau (lignes, width) contigu de doubles) dans une image
+    (height, width) sur `root` (None sur les autres processus). La racine reçoit les
+    lignes du processus r avec le type Create_vector(nb_lignes, width, size*width)
+    à partir de la ligne r : aucune copie ni réordonnancement après réception.
+    """
+    rank, size = comm.Get_rank(), comm.Get_size()
+    width = local_data.shape[1]
+    if rank != root:
+        if local_data.size > 0:
+            comm.Send(local_data, dest=root, tag=TAG_CYCLIC)
+        return None
+
+    image = np.empty((height, width), dtype=np.double)
+    flat_image = image.reshape(-1)
+    requests, row_types = [], []
+    for r in range(size):
+        nb_rows = len(range(r, height, size))
+        if r == root or nb_rows == 0:
+            continue
+        row_type = MPI.DOUBLE.Create_vector(nb_rows, width, size*width).Commit()
+        requests.append(comm.Irecv([flat_image[r*width:], 1, row_type], source=r, tag=TAG_CYCLIC))
+        row_types.append(row_type)
+    image[root::size] = local_data
+    MPI.Request.Waitall(requests)
+    for row_type in row_types:
+        row_type.Free()
+    return image
+
+
+def gather_cyclic_reassemble(comm, local_data: np.ndarray, height: int, root: int = 0):
+    """Même résultat que gather_cyclic, par Gatherv dans l'ordre des rangs puis reconstruction"""
+    rank, size = comm.Get_rank(), comm.Get_size()
+    width = local_data.shape[1]
+    local_indices = np.arange(rank, height, size, dtype=np.int32)
+
+    # Rassemblement: collecter les nombres de lignes par processus
+    local_count = np.array([local_indices.size], dtype=np.int32)
+    all_counts = np.empty(size, dtype=np.int32) if rank == root else None
+    comm.Gather(local_count, all_counts, root=root)
+
+    # Gatherv pour les indices puis pour les données
+    all_indices = all_data = None
+    indices_displ = data_counts = data_displ = None
+    if rank == root:
+        all_indices = np.empty(height, dtype=np.int32)
+        indices_displ = np.array([0] + list(np.cumsum(all_counts)[:-1]))
+        all_data = np.empty(height * width, dtype=np.double)
+        data_counts = all_counts * width
+        data_displ = np.array([0] + list(np.cumsum(data_counts)[:-1]))
+    comm.Gatherv(local_indices, [all_indices, all_counts, indices_displ, MPI.INT], root=root)
+    comm.Gatherv(local_data.flatten(), [all_data, data_counts, data_displ, MPI.DOUBLE], root=root)
+
+    if rank != root:
+        return None
+    # Reconstruction de l'image
+    image = np.empty((height, width), dtype=np.double)
+    for i in range(height):
+        image[all_indices[i]] = all_data[i * width:(i + 1) * width]
+    return image
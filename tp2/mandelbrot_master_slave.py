@@ -1,141 +1,367 @@
 """
 Ensemble de Mandelbrot - Stratégie Maître-Esclave
-Le processus 0 distribue dynamiquement les lignes aux esclaves
+Le processus 0 distribue dynamiquement des paquets de lignes aux esclaves
+
+Chaque esclave a toujours deux tâches en attente (la suivante est déjà arrivée
+quand il termine la courante) et renvoie ses lignes par Isend : le maître les
+reçoit par Irecv directement dans le tableau `convergence` (lignes contiguës).
+
+Options :
+    --chunk static   : height/nb_esclaves lignes par tâche, attribuées à l'avance
+    --chunk dynamic  : tâches de --band lignes distribuées à la demande
+    --chunk guided   : taille décroissante, reste/(2*nb_esclaves), au moins --band lignes
+    --band N         : taille des tâches (dynamic) ou taille minimale (guided)
+    --mode mariani   : chaque tâche est rendue par subdivision de rectangles
+                       (Mariani-Silver) au lieu de calculer tous les pixels
+    --master-computes : le maître calcule aussi (thread de calcul sur ses propres
+                       tâches) pendant que le thread principal sert les esclaves
+    --progressive    : rendu par passes (1/64, 1/16, 1/4 puis tous les pixels) : toutes
+                       les tâches d'une passe sont distribuées avant celles de la suivante,
+                       et le maître enregistre un aperçu dès qu'une passe est complète
+    --trace FICHIER  : trace envois, réceptions, attentes et calcul de chaque processus
+                       (mpi_trace.py ; le thread de calcul du maître n'est pas tracé)
 
 TP2 - Question 1.3
 """
 from mpi4py import MPI
 import numpy as np
-from dataclasses import dataclass
+import argparse
+import json
+import threading
 from PIL import Image
-from math import log
-from time import time
-
-@dataclass
-class MandelbrotSet:
-    max_iterations: int
-    escape_radius:  float = 2.0
-
-    def convergence(self, c: complex, smooth=False, clamp=True) -> float:
-        value = self.count_iterations(c, smooth)/self.max_iterations
-        return max(0.0, min(value, 1.0)) if clamp else value
-
-    def count_iterations(self, c: complex, smooth=False) -> int | float:
-        if c.real*c.real+c.imag*c.imag < 0.0625:
-            return self.max_iterations
-        if (c.real+1)*(c.real+1)+c.imag*c.imag < 0.0625:
-            return self.max_iterations
-        if (c.real > -0.75) and (c.real < 0.5):
-            ct = c.real-0.25 + 1.j * c.imag
-            ctnrm2 = abs(ct)
-            if ctnrm2 < 0.5*(1-ct.real/max(ctnrm2, 1.E-14)):
-                return self.max_iterations
-        z = 0
-        for iter in range(self.max_iterations):
-            z = z*z + c
-            if abs(z) > self.escape_radius:
-                if smooth:
-                    return iter + 1 - log(log(abs(z)))/log(2)
-                return iter
-        return self.max_iterations
+from time import time, sleep
+from mandelbrot_engine import (MandelbrotSet, grayscale, mariani_silver, PROGRESSIVE_STRIDES,
+                               progressive_subgrids, subgrids_size, convergence_subgrids,
+                               scatter_subgrids)
+from mpi_trace import Tracer
 
 # Tags pour les messages
-TAG_TASK = 1      # Envoi d'une tâche (numéro de ligne)
+TAG_TASK = 1      # Envoi d'une tâche (passe, première et dernière+1 lignes)
 TAG_RESULT = 2    # Envoi du résultat
 TAG_TERMINATE = 3 # Signal de terminaison
 
+# Nombre de tâches en attente par esclave (masque la latence maître -> esclave)
+TASKS_IN_FLIGHT = 2
+# Pause (s) de la boucle de progression du maître quand aucun résultat n'est arrivé :
+# libère le GIL pour le thread de calcul
+POLL_INTERVAL = 1.E-4
+
+parser = argparse.ArgumentParser(description="Mandelbrot maître-esclave")
+parser.add_argument('--mode', choices=['pixels', 'mariani'], default='pixels',
+                    help='Calcul de tous les pixels ou subdivision Mariani-Silver')
+parser.add_argument('--chunk', choices=['static', 'dynamic', 'guided'], default='guided',
+                    help='Politique de découpage des tâches')
+parser.add_argument('--band', type=int, default=1,
+                    help='Lignes par tâche (dynamic) ou minimum (guided)')
+parser.add_argument('--master-computes', action='store_true',
+                    help='Le maître calcule aussi ses propres tâches')
+parser.add_argument('--progressive', action='store_true',
+                    help='Rendu par passes de plus en plus fines, avec aperçus')
+parser.add_argument('--trace', default=None, metavar='FICHIER',
+                    help="Trace d'exécution par processus (JSON, ui.perfetto.dev)")
+parser.add_argument('--width', type=int, default=1024)
+parser.add_argument('--height', type=int, default=1024)
+parser.add_argument('--max-iterations', type=int, default=50)
+args = parser.parse_args()
+if args.progressive and args.mode == 'mariani':
+    parser.error("--progressive n'est pas compatible avec --mode mariani")
+
 # Initialisation MPI
 comm = MPI.COMM_WORLD
 rank = comm.Get_rank()
 size = comm.Get_size()
+tracer = Tracer(comm, enabled=args.trace is not None)
 
-if size < 2:
+if size < 2 and not args.master_computes:
     if rank == 0:
         print("ERREUR: Cette stratégie nécessite au moins 2 processus!")
         print("Usage: mpirun -np N python3 mandelbrot_master_slave.py (N >= 2)")
+        print("       ou --master-computes pour que le maître calcule aussi")
     MPI.Finalize()
     exit(1)
 
 # Paramètres
-mandelbrot_set = MandelbrotSet(max_iterations=50, escape_radius=10)
-width, height = 1024, 1024
+mandelbrot_set = MandelbrotSet(max_iterations=args.max_iterations, escape_radius=10)
+width, height = args.width, args.height
 scaleX = 3./width
 scaleY = 2.25/height
+# Pas des passes de rendu (une seule passe complète sans --progressive)
+strides = PROGRESSIVE_STRIDES if args.progressive else (1,)
+
+# Pixels réellement calculés / remplis par Mariani-Silver sur ce processus
+nb_evaluated = 0
+nb_filled = 0
+
+
+def task_subgrids(p, y, y_end):
+    """Sous-grilles de pixels calculées par la tâche (passe p, lignes y à y_end-1)"""
+    return progressive_subgrids(strides, p, y, y_end, width)
+
+
+def contiguous_task(p):
+    """Vrai si les pixels d'une tâche de la passe p sont des lignes complètes de l'image"""
+    return p == 0 and strides[0] == 1
+
+
+def compute_task(p, y, y_end, out=None):
+    """
+    Calcule les pixels de la tâche (passe p, lignes y à y_end-1), mis bout à bout
+    (tableau (lignes, width) pour une passe complète), dans out si donné
+    """
+    global nb_evaluated, nb_filled
+    if args.mode == 'mariani':
+        data, evaluated, filled = mariani_silver(mandelbrot_set, y, y_end, width,
+                                                 scaleX, scaleY, smooth=True)
+        nb_evaluated += evaluated
+        nb_filled += filled
+        if out is not None:
+            out[...] = data
+        return data
+    subgrids = task_subgrids(p, y, y_end)
+    if out is None and contiguous_task(p):
+        out = np.empty((y_end - y, width), dtype=np.double)
+    data = convergence_subgrids(mandelbrot_set, subgrids, scaleX, scaleY, smooth=True, out=out)
+    nb_evaluated += data.size
+    return data
+
+
+class ChunkScheduler:
+    """
+    Découpage des lignes [0, height) en tâches (p, y, y_end) selon la politique choisie,
+    entre les processus de calcul `workers` (rangs des esclaves, et 0 si le maître calcule).
+    Les passes p = 0, 1, ... sont découpées l'une après l'autre : toutes les tâches d'une
+    passe sont distribuées avant celles de la suivante. pass_weights donne le coût d'une
+    ligne de chaque passe (1 pour la plus coûteuse) : les tâches des passes grossières
+    ont plus de lignes, pour un coût par tâche comparable.
+    next_task(worker) renvoie None quand il n'y a plus rien à donner à ce processus.
+    Appelé à la fois par le thread principal et le thread de calcul du maître.
+    """
+    def __init__(self, policy: str, height: int, workers: list, band: int,
+                 pass_weights=(1.,)):
+        self.policy = policy
+        self.height = height
+        self.num_workers = len(workers)
+        self.band = max(1, band)
+        self.pass_weights = pass_weights
+        nb_passes = len(pass_weights)
+        self.nb_passes = nb_passes
+        self.current_pass = 0
+        self.next_row = 0
+        # Lignes terminées de chaque passe (une passe est complète à height lignes)
+        self.rows_done = [0]*nb_passes
+        self.lock = threading.Lock()
+        if policy == 'static':
+            # Blocs égaux attribués à l'avance : le bloc i revient au processus workers[i]
+            rows = -(-height // self.num_workers)
+            self.static_tasks = {w: [(p, y, min(y + rows, height)) for p in range(nb_passes)]
+                                 for w, y in zip(workers, range(0, height, rows))}
+
+    def next_task(self, worker: int):
+        with self.lock:
+            return self._next_task(worker)
+
+    def task_done(self, p: int, rows: int):
+        with self.lock:
+            self.rows_done[p] += rows
+
+    def pass_complete(self, p: int) -> bool:
+        return self.rows_done[p] == self.height
+
+    def _next_task(self, worker: int):
+        if self.policy == 'static':
+            tasks = self.static_tasks.get(worker, [])
+            return tasks.pop(0) if tasks else None
+        remaining = self.height - self.next_row
+        if remaining <= 0:
+            if self.current_pass + 1 >= self.nb_passes:
+                return None
+            self.current_pass += 1
+            self.next_row, remaining = 0, self.height
+        weight = self.pass_weights[self.current_pass]
+        band = int(np.ceil(self.band / weight))
+        if self.policy == 'guided':
+            # Travail restant (en lignes de la passe la plus coûteuse), passes suivantes comprises
+            work = remaining*weight + self.height*sum(self.pass_weights[self.current_pass+1:])
+            rows = max(band, int(np.ceil(work / (TASKS_IN_FLIGHT*self.num_workers) / weight)))
+        else:
+            rows = band
+        y = self.next_row
+        self.next_row = min(y + rows, self.height)
+        return self.current_pass, y, self.next_row
 
-def compute_row(y):
-    """Calcule une ligne de l'image"""
-    row = np.empty(width, dtype=np.double)
-    for x in range(width):
-        c = complex(-2. + scaleX*x, -1.125 + scaleY * y)
-        row[x] = mandelbrot_set.convergence(c, smooth=True)
-    return row
 
 if rank == 0:
     # === PROCESSUS MAÎTRE ===
-    convergence = np.empty((width, height), dtype=np.double)
-    next_row = 0
-    completed_rows = 0
+    convergence = np.empty((height, width), dtype=np.double)
     num_workers = size - 1
-    active_workers = 0
-    
+    workers = ([0] if args.master_computes else []) + list(range(1, size))
+    pass_sizes = [subgrids_size(progressive_subgrids(strides, p, 0, height, width))
+                  for p in range(len(strides))]
+    scheduler = ChunkScheduler(args.chunk, height, workers, args.band,
+                               [n / max(pass_sizes) for n in pass_sizes])
+    terminated = [False]*size
+    requests = []     # Irecv en cours, un par tâche distribuée
+    tasks = []        # (esclave, p, y, y_end, tampon) correspondant à chaque Irecv
+    next_preview = 0  # Prochaine passe dont l'aperçu reste à enregistrer
+    t_first_preview = None
+    nb_tasks = 0
+    # Instrumentation du maître : distribution (envois, réceptions postées),
+    # attente des résultats, calcul de ses propres tâches
+    t_dispatch = t_wait = t_compute = 0.
+    master_rows = 0
+
+    def master_compute():
+        """Thread de calcul du maître : traite ses tâches directement dans convergence"""
+        global t_compute, master_rows
+        while (task := scheduler.next_task(0)) is not None:
+            p, y, y_end = task
+            t0 = time()
+            if contiguous_task(p):
+                compute_task(p, y, y_end, out=convergence[y:y_end])
+            else:
+                scatter_subgrids(convergence, task_subgrids(p, y, y_end),
+                                 compute_task(p, y, y_end))
+            t_compute += time() - t0
+            master_rows += y_end - y
+            scheduler.task_done(p, y_end - y)
+
+    def save_previews():
+        """Enregistre l'aperçu de chaque nouvelle passe complète (sauf la dernière)"""
+        global next_preview, t_first_preview
+        while next_preview < len(strides) - 1 and scheduler.pass_complete(next_preview):
+            stride = strides[next_preview]
+            Image.fromarray(grayscale(convergence[::stride, ::stride])).save(
+                f"mandelbrot_master_slave_preview_{stride}.png")
+            if t_first_preview is None:
+                t_first_preview = time() - deb
+            next_preview += 1
+
+    def dispatch(worker):
+        """Envoie une nouvelle tâche à l'esclave (ou le signal de fin) et poste la réception"""
+        global nb_tasks
+        task = scheduler.next_task(worker)
+        if task is None:
+            if not terminated[worker]:
+                with tracer.span('send', 'Send (fin)'):
+                    comm.Send(np.array([-1, -1, -1], dtype=np.int64), dest=worker, tag=TAG_TERMINATE)
+                terminated[worker] = True
+            return
+        p, y, y_end = task
+        with tracer.span('send', 'Send (tâche)'):
+            comm.Send(np.array(task, dtype=np.int64), dest=worker, tag=TAG_TASK)
+        # Les messages d'un même esclave arrivent dans l'ordre d'envoi des tâches :
+        # une passe complète est reçue directement dans les lignes correspondantes,
+        # les pixels d'une passe progressive dans un tampon rangé à l'arrivée
+        if contiguous_task(p):
+            buffer = None
+            requests.append(comm.Irecv(convergence[y:y_end], source=worker, tag=TAG_RESULT))
+        else:
+            buffer = np.empty(subgrids_size(task_subgrids(p, y, y_end)), dtype=np.double)
+            requests.append(comm.Irecv(buffer, source=worker, tag=TAG_RESULT))
+        tasks.append((worker, p, y, y_end, buffer))
+        nb_tasks += 1
+
     deb = time()
-    
-    # Envoi initial : une ligne à chaque esclave
-    for worker in range(1, size):
-        if next_row < height:
-            comm.send(next_row, dest=worker, tag=TAG_TASK)
-            next_row += 1
-            active_workers += 1
-    
-    # Boucle principale : recevoir résultats et envoyer nouvelles tâches
-    while completed_rows < height:
-        # Recevoir un résultat de n'importe quel esclave
-        status = MPI.Status()
-        result = comm.recv(source=MPI.ANY_SOURCE, tag=TAG_RESULT, status=status)
-        worker = status.Get_source()
-        
-        row_idx, row_data = result
-        convergence[:, row_idx] = row_data
-        completed_rows += 1
-        
-        # Envoyer une nouvelle tâche ou signal de terminaison
-        if next_row < height:
-            comm.send(next_row, dest=worker, tag=TAG_TASK)
-            next_row += 1
+
+    # Envoi initial : TASKS_IN_FLIGHT tâches à chaque esclave
+    for _ in range(TASKS_IN_FLIGHT):
+        for worker in range(1, size):
+            dispatch(worker)
+    t_dispatch += time() - deb
+
+    compute_thread = None
+    if args.master_computes:
+        compute_thread = threading.Thread(target=master_compute)
+        compute_thread.start()
+
+    # Boucle principale : à chaque résultat reçu, l'esclave reçoit une nouvelle tâche.
+    # Si le maître calcule, la boucle interroge les réceptions (Testany) au lieu de
+    # bloquer, seul le thread principal fait des appels MPI (MPI_THREAD_FUNNELED suffit)
+    while requests or (compute_thread is not None and compute_thread.is_alive()):
+        t0 = time()
+        if compute_thread is None:
+            with tracer.span('wait', 'Waitany'):
+                index, flag = MPI.Request.Waitany(requests), True
+        elif requests:
+            index, flag = MPI.Request.Testany(requests)
         else:
-            comm.send(-1, dest=worker, tag=TAG_TERMINATE)
-            active_workers -= 1
-    
+            flag = False
+        t1 = time()
+        t_wait += t1 - t0
+        if flag:
+            requests.pop(index)
+            worker, p, y, y_end, buffer = tasks.pop(index)
+            dispatch(worker)
+            t_dispatch += time() - t1
+            if buffer is not None:
+                scatter_subgrids(convergence, task_subgrids(p, y, y_end), buffer)
+            scheduler.task_done(p, y_end - y)
+        else:
+            with tracer.span('wait', 'sleep'):
+                sleep(POLL_INTERVAL)
+            t_wait += time() - t1
+        save_previews()
+
+    if compute_thread is not None:
+        compute_thread.join()
+
     fin = time()
-    
+
     print(f"\n=== Résultats Maître-Esclave ({size} processus, {num_workers} esclaves) ===")
+    print(f"Mode: {args.mode}, découpage: {args.chunk} ({nb_tasks} tâches)")
+    if t_first_preview is not None:
+        print(f"Premier aperçu (1/{strides[0]**2} des pixels): {t_first_preview:.4f}s")
     print(f"Temps de calcul total: {fin-deb:.4f}s")
-    
-    # Création de l'image
-    deb_img = time()
-    image = Image.fromarray(np.uint8(convergence.T * 255))
-    fin_img = time()
-    print(f"Temps de constitution de l'image: {fin_img-deb_img:.4f}s")
-    image.save(f"mandelbrot_master_slave_{size}p.png")
-    print(f"Image sauvegardée: mandelbrot_master_slave_{size}p.png")
+    print("BENCH:" + json.dumps({"time": fin - deb}))
+    print(f"Maître : distribution {t_dispatch:.4f}s, attente {t_wait:.4f}s, "
+          f"calcul {t_compute:.4f}s ({master_rows} lignes)")
 
 else:
     # === PROCESSUS ESCLAVE ===
     rows_computed = 0
-    
+    nb_tasks = 0
+    task = np.empty(3, dtype=np.int64)
+    sends = []        # (requête Isend, tampon envoyé) encore en cours
+
     while True:
         # Recevoir une tâche
         status = MPI.Status()
-        row_idx = comm.recv(source=0, tag=MPI.ANY_TAG, status=status)
-        
+        with tracer.span('recv', 'Recv (tâche)'):
+            comm.Recv(task, source=0, tag=MPI.ANY_TAG, status=status)
+
         if status.Get_tag() == TAG_TERMINATE:
             break
-        
-        # Calculer la ligne
-        row_data = compute_row(row_idx)
-        rows_computed += 1
-        
-        # Envoyer le résultat
-        comm.send((row_idx, row_data), dest=0, tag=TAG_RESULT)
-    
-    print(f"Esclave {rank}: {rows_computed} lignes calculées")
+
+        # Calculer les lignes demandées
+        p, y, y_end = (int(v) for v in task)
+        with tracer.span('compute'):
+            band_data = compute_task(p, y, y_end)
+        rows_computed += y_end - y
+        nb_tasks += 1
+
+        # Envoyer le résultat sans attendre sa réception
+        with tracer.span('send', 'Isend'):
+            sends.append((comm.Isend(band_data, dest=0, tag=TAG_RESULT), band_data))
+        sends = [(req, buf) for req, buf in sends if not req.Test()]
+
+    with tracer.span('wait', 'Waitall'):
+        MPI.Request.Waitall([req for req, _ in sends])
+    print(f"Esclave {rank}: {rows_computed} lignes calculées ({nb_tasks} tâches)")
+
+# Bilan des pixels calculés / remplis
+total_evaluated = comm.reduce(nb_evaluated, op=MPI.SUM, root=0)
+total_filled = comm.reduce(nb_filled, op=MPI.SUM, root=0)
+
+if rank == 0:
+    print(f"Pixels calculés: {total_evaluated} ({100*total_evaluated/(width*height):.1f}%), "
+          f"pixels remplis: {total_filled} ({100*total_filled/(width*height):.1f}%)")
+
+    # Création de l'image
+    deb_img = time()
+    image = Image.fromarray(grayscale(convergence))
+    fin_img = time()
+    print(f"Temps de constitution de l'image: {fin_img-deb_img:.4f}s")
+    image.save(f"mandelbrot_master_slave_{size}p.png")
+    print(f"Image sauvegardée: mandelbrot_master_slave_{size}p.png")
+
+tracer.save(args.trace, f"mandelbrot_master_slave ({size} processus)")
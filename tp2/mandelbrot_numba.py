@@ -0,0 +1,74 @@
+"""
+Noyau Numba du moteur Mandelbrot (backend 'numba' de MandelbrotSet)
+Même calcul point par point que MandelbrotSet.count_iterations : zones de convergence
+connues, détection de cycle (Brent) et coloration lissée, mais compilé et parallélisé
+sur les threads (prange). La compilation est mise en cache sur disque (cache=True).
+
+Le nombre de threads se règle avec la variable d'environnement NUMBA_NUM_THREADS,
+ce qui permet des exécutions hybrides MPI x threads.
+"""
+import numba
+import numpy as np
+from math import log, sqrt
+
+LOG2 = log(2)
+
+
+@numba.njit(cache=True)
+def count_point(c: complex, max_iterations: int, escape_radius: float, smooth: bool,
+                cycle_tolerance: float):
+    """Nombre d'itérations du point c et indicateur de sortie par détection de cycle"""
+    cr, ci = c.real, c.imag
+    #   1. Appartenance aux disques  C0{(0,0),1/4} et C1{(-1,0),1/4}
+    if cr*cr + ci*ci < 0.0625:
+        return float(max_iterations), 0
+    if (cr+1)*(cr+1) + ci*ci < 0.0625:
+        return float(max_iterations), 0
+    #  2.  Appartenance à la cardioïde {(1/4,0),1/2(1-cos(theta))}
+    if cr > -0.75 and cr < 0.5:
+        ctr = cr - 0.25
+        ctnrm2 = sqrt(ctr*ctr + ci*ci)
+        if ctnrm2 < 0.5*(1 - ctr/max(ctnrm2, 1.E-14)):
+            return float(max_iterations), 0
+    # Sinon on itère, avec détection de cycle (algorithme de Brent).
+    # Parties réelle et imaginaire séparées et tests de module au carré, dans le même
+    # ordre que MandelbrotSet.count_iterations : mêmes nombres d'itérations que les autres
+    # backends, valeurs lissées à 1e-15 près (log de LLVM et de numpy au dernier bit près)
+    escape_radius2 = escape_radius*escape_radius
+    cycle_tolerance2 = cycle_tolerance*cycle_tolerance
+    zr = zi = zr2 = zi2 = 0.
+    zr_ref = zi_ref = 0.
+    period, lam = 1, 0
+    for iter in range(max_iterations):
+        zi = 2*(zr*zi) + ci
+        zr = (zr2 - zi2) + cr
+        zr2, zi2 = zr*zr, zi*zi
+        modulus2 = zr2 + zi2
+        if modulus2 > escape_radius2:
+            if smooth:
+                return iter + 1 - np.log(0.5*np.log(modulus2))/LOG2, 0
+            return float(iter), 0
+        dr, di = zr - zr_ref, zi - zi_ref
+        if dr*dr + di*di < cycle_tolerance2:
+            return float(max_iterations), 1
+        lam += 1
+        if lam == period:
+            zr_ref, zi_ref = zr, zi
+            period, lam = 2*period, 0
+    return float(max_iterations), 0
+
+
+@numba.njit(parallel=True, cache=True)
+def count_iterations(c: np.ndarray, max_iterations: int, escape_radius: float, smooth: bool,
+                     cycle_tolerance: float, out: np.ndarray) -> int:
+    """
+    Remplit out (1-D) avec le nombre d'itérations de chaque point de c (1-D),
+    renvoie le nombre de points sortis par détection de cycle
+    """
+    nb_periodic = 0
+    for k in numba.prange(c.size):
+        value, periodic = count_point(c[k], max_iterations, escape_radius, smooth,
+                                      cycle_tolerance)
+        out[k] = value
+        nb_periodic += periodic
+    return nb_periodic
@@ -0,0 +1,101 @@
+"""
+Ensemble de Mandelbrot - Rendu hors mémoire (images de plusieurs gigapixels)
+Aucun processus ne possède l'image entière : chaque processus calcule des bandes de
+--band lignes (réparties cycliquement) et les écrit directement dans un fichier brut
+partagé (uint8, lignes contiguës), soit par MPI-IO (File.Write_at), soit par np.memmap.
+Une pyramide de tuiles PNG est ensuite construite pour la visualisation.
+
+Usage :
+    mpirun -np 8 python3 mandelbrot_outofcore.py --width 65536 --height 65536
+    mpirun -np 4 python3 mandelbrot_outofcore.py --io memmap --output rendu
+"""
+from mpi4py import MPI
+import numpy as np
+import argparse
+import os
+from time import time
+from mandelbrot_engine import MandelbrotSet, complex_grid, grayscale
+from mandelbrot_pyramid import level_path, build_pyramid
+
+parser = argparse.ArgumentParser(description="Mandelbrot hors mémoire (fichier brut + pyramide)")
+parser.add_argument('--width', type=int, default=16384)
+parser.add_argument('--height', type=int, default=16384)
+parser.add_argument('--max-iterations', type=int, default=50)
+parser.add_argument('--band', type=int, default=64, help='Lignes calculées et écrites à la fois')
+parser.add_argument('--io', choices=['mpiio', 'memmap'], default='mpiio',
+                    help="Écriture des bandes : MPI-IO (File.Write_at) ou np.memmap")
+parser.add_argument('--output', default='mandelbrot_outofcore',
+                    help='Dossier du fichier brut (level_0.raw) et de la pyramide')
+parser.add_argument('--no-pyramid', action='store_true', help='Ne pas construire la pyramide')
+args = parser.parse_args()
+
+# Initialisation MPI
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+# Paramètres
+mandelbrot_set = MandelbrotSet(max_iterations=args.max_iterations, escape_radius=10)
+width, height = args.width, args.height
+scaleX = 3./width
+scaleY = 2.25/height
+path = level_path(args.output, 0)
+
+if rank == 0:
+    os.makedirs(args.output, exist_ok=True)
+    if args.io == 'memmap':
+        with open(path, 'wb') as f:
+            f.truncate(width*height)
+comm.Barrier()
+
+if args.io == 'mpiio':
+    fh = MPI.File.Open(comm, path, MPI.MODE_WRONLY | MPI.MODE_CREATE)
+    fh.Set_size(width*height)
+else:
+    image = np.memmap(path, dtype=np.uint8, mode='r+', shape=(height, width))
+
+# Tampons d'une bande : seule mémoire proportionnelle à l'image sur chaque processus
+convergence = np.empty((args.band, width), dtype=np.double)
+pixels = np.empty((args.band, width), dtype=np.uint8)
+t_calc = t_write = 0.
+nb_rows = 0
+
+comm.Barrier()
+deb = MPI.Wtime()
+for y in range(rank*args.band, height, size*args.band):
+    rows = range(y, min(y + args.band, height))
+    t0 = MPI.Wtime()
+    c = complex_grid(rows, width, scaleX, scaleY)
+    mandelbrot_set.convergence_tile(c, smooth=True, out=convergence[:len(rows)])
+    grayscale(convergence[:len(rows)], out=pixels[:len(rows)])
+    t1 = MPI.Wtime()
+    if args.io == 'mpiio':
+        fh.Write_at(y*width, pixels[:len(rows)])
+    else:
+        image[y:y + len(rows)] = pixels[:len(rows)]
+    t_write += MPI.Wtime() - t1
+    t_calc += t1 - t0
+    nb_rows += len(rows)
+
+if args.io == 'mpiio':
+    fh.Close()
+else:
+    image.flush()
+    del image
+comm.Barrier()
+fin = MPI.Wtime()
+
+print(f"Processus {rank}: {nb_rows} lignes, calcul {t_calc:.3f}s, écriture {t_write:.3f}s")
+comm.Barrier()
+if rank == 0:
+    print(f"\n=== Rendu hors mémoire {width}x{height} ({width*height/1e9:.2f} Gpixels), "
+          f"{size} processus, écriture {args.io} ===")
+    print(f"Temps de calcul et d'écriture: {fin-deb:.3f}s -> {path}")
+
+if not args.no_pyramid:
+    deb = MPI.Wtime()
+    nb_levels = build_pyramid(comm, args.output, width, height)
+    fin = MPI.Wtime()
+    if rank == 0:
+        print(f"Pyramide: {nb_levels} niveaux de tuiles dans {args.output}/<niveau>/ "
+              f"({fin-deb:.3f}s)")
@@ -0,0 +1,144 @@
+"""
+Zoom profond par la théorie des perturbations
+
+Au-delà d'un grossissement d'environ 1e13, l'écart entre deux pixels voisins n'est plus
+représentable autour de c en double précision. On calcule alors une seule orbite de
+référence Z_n (centre C de la vue) en précision arbitraire (module decimal), puis pour
+chaque pixel c = C + dc l'écart d_n = z_n - Z_n en double précision :
+
+    d_{n+1} = 2 Z_n d_n + d_n² + dc
+
+Les écarts restent petits (de l'ordre de dc), donc représentables en float64 jusqu'à des
+grossissements de ~1e300 : le coût par pixel est celui du calcul en double précision.
+
+    reference_orbit      : orbite de référence en précision arbitraire
+    series_approximation : d_n ≈ A_n dc + B_n dc² + C_n dc³, permet de sauter les
+                           premières itérations, communes à tous les pixels de la vue
+    perturbation_tile    : itérations des écarts pour une tuile de pixels, avec
+                           détection des pixels mal approchés (glitches) et rebasage
+"""
+import numpy as np
+from decimal import Decimal, localcontext
+from mandelbrot_engine import MandelbrotSet, COMPACT_EVERY, LOG2
+
+# Tolérance relative de l'approximation par série : le terme C_n dc³ doit rester
+# négligeable devant le terme A_n dc
+SERIES_TOLERANCE = 1.E-12
+
+
+def precision_digits(span) -> int:
+    """Nombre de chiffres significatifs nécessaires pour une vue de largeur `span`"""
+    return max(20, int(-Decimal(span).log10()) + 20)
+
+
+def reference_orbit(center_x, center_y, max_iterations: int, escape_radius: float,
+                    digits: int) -> np.ndarray:
+    """
+    Orbite Z_0 = 0, Z_1, ... du centre C = center_x + i*center_y (chaînes ou Decimal),
+    calculée avec `digits` chiffres puis arrondie en complex128.
+    Le calcul s'arrête à la première valeur qui dépasse escape_radius (incluse)
+    ou après max_iterations itérations.
+    """
+    orbit = np.empty(max_iterations + 1, dtype=np.complex128)
+    with localcontext() as ctx:
+        ctx.prec = digits
+        cr, ci = Decimal(center_x), Decimal(center_y)
+        zr, zi = Decimal(0), Decimal(0)
+        radius2 = Decimal(escape_radius)**2
+        orbit[0] = 0.
+        for n in range(1, max_iterations + 1):
+            zr, zi = zr*zr - zi*zi + cr, 2*zr*zi + ci
+            orbit[n] = complex(float(zr), float(zi))
+            if zr*zr + zi*zi > radius2:
+                return orbit[:n + 1]
+    return orbit
+
+
+def series_approximation(orbit: np.ndarray, dc_max: float, escape_radius: float,
+                         tolerance: float = SERIES_TOLERANCE):
+    """
+    Coefficients (skip, A, B, C) tels que d_skip ≈ A dc + B dc² + C dc³ pour tous les
+    pixels |dc| <= dc_max, avec A_{n+1} = 2 Z_n A_n + 1, B_{n+1} = 2 Z_n B_n + A_n²,
+    C_{n+1} = 2 Z_n C_n + 2 A_n B_n. On avance tant que le terme cubique reste
+    négligeable, qu'aucun pixel ne peut diverger et que |d_n| reste petit devant |Z_n|
+    (aucun rebasage n'aurait été nécessaire).
+    """
+    a = b = c = 0j
+    skip = 0
+    for n in range(orbit.size - 2):
+        z2 = 2*orbit[n]
+        a, b, c = z2*a + 1, z2*b + a*a, z2*c + 2*a*b
+        bound = abs(a)*dc_max + abs(b)*dc_max**2 + abs(c)*dc_max**3
+        z = abs(orbit[n + 1])
+        if (not np.isfinite(bound) or abs(c)*dc_max**3 > tolerance*abs(a)*dc_max
+                or z + bound > escape_radius or 2*bound > z):
+            break
+        skip = n + 1
+        a_ok, b_ok, c_ok = a, b, c
+    if skip == 0:
+        return 0, 0j, 0j, 0j
+    return skip, a_ok, b_ok, c_ok
+
+
+def perturbation_tile(mandelbrot_set: MandelbrotSet, orbit: np.ndarray, dc: np.ndarray,
+                      smooth=False, out=None, series=(0, 0j, 0j, 0j),
+                      compact_every: int = COMPACT_EVERY):
+    """
+    Nombre d'itérations (éventuellement lissé) des pixels C + dc, calculé par
+    perturbation autour de l'orbite de référence. Renvoie (out, nb_rebased).
+
+    Chaque pixel suit sa propre position m dans l'orbite de référence. Il est rebasé
+    (d <- z, m <- 0) quand |z| < |d| : l'écart n'est alors plus petit devant la
+    référence et l'arrondi de d_n ferait apparaître des zones uniformes erronées
+    (glitches). Il l'est aussi quand il atteint la fin de l'orbite de référence
+    (si C diverge avant max_iterations).
+    """
+    dc = np.ascontiguousarray(dc, dtype=np.complex128)
+    if out is None:
+        out = np.empty(dc.shape, dtype=np.double)
+    flat_out = out.reshape(-1)
+    out.fill(mandelbrot_set.max_iterations)
+    skip, coef_a, coef_b, coef_c = series
+
+    active = np.arange(dc.size)
+    dc_act = dc.reshape(-1).copy()
+    delta = ((coef_c*dc_act + coef_b)*dc_act + coef_a)*dc_act
+    m = np.full(active.size, skip, dtype=np.int64)
+    # Fin de l'orbite de référence, si C a divergé avant max_iterations (sinon aucun
+    # pixel ne l'atteint avant la dernière itération)
+    last = orbit.size - 1 if orbit.size <= mandelbrot_set.max_iterations else -1
+    nb_escaped = 0
+    nb_rebased = 0
+    # Comme dans count_iterations_tile, un pixel qui diverge reçoit dc = nan et reste
+    # dans les tampons jusqu'au prochain compactage
+    with np.errstate(over='ignore', invalid='ignore'):
+        for iter in range(skip, mandelbrot_set.max_iterations):
+            if active.size == 0:
+                break
+            ref = orbit[m]
+            ref *= 2
+            ref += delta
+            delta *= ref
+            delta += dc_act
+            m += 1
+            z = orbit[m] + delta
+            modulus = np.abs(z)
+            escaped = modulus > mandelbrot_set.escape_radius
+            if escaped.any():
+                idx = active[escaped]
+                if smooth:
+                    flat_out[idx] = iter + 1 - np.log(np.log(modulus[escaped]))/LOG2
+                else:
+                    flat_out[idx] = iter
+                dc_act[escaped] = np.nan
+                nb_escaped += idx.size
+            rebase = (modulus < np.abs(delta)) | (m == last)
+            if rebase.any():
+                delta[rebase] = z[rebase]
+                m[rebase] = 0
+                nb_rebased += np.count_nonzero(rebase & ~np.isnan(dc_act.real))
+            if (iter + 1) % compact_every == 0 and nb_escaped > 0:
+                alive = ~np.isnan(dc_act.real)
+                active, dc_act, delta, m = active[alive], dc_act[alive], delta[alive], m[alive]
+                nb_escaped = 0
+    return out, nb_rebased
@@ -0,0 +1,70 @@
+"""
+Écriture d'une image PNG par bandes de lignes
+
+PIL doit disposer de toute l'image avant de l'encoder ; ici chaque bande de lignes est
+compressée (zlib) et écrite dès qu'elle est prête. Une image de 16k x 16k peut ainsi être
+calculée, colorée et enregistrée bande par bande, sans jamais être entière en mémoire.
+"""
+import numpy as np
+import struct
+import zlib
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Type de couleur PNG selon le nombre de canaux (niveaux de gris, RGB)
+COLOR_TYPES = {1: 0, 3: 2}
+# Taille des blocs IDAT écrits dans le fichier
+IDAT_SIZE = 1 << 20
+
+
+class PNGBandWriter:
+    """
+    Image PNG (height, width) en uint8, à 1 (niveaux de gris) ou 3 (RGB) canaux,
+    écrite par bandes successives avec write(band) ; close() termine le fichier.
+    Utilisable comme gestionnaire de contexte.
+    """
+    def __init__(self, path: str, width: int, height: int, channels: int = 3,
+                 compress_level: int = 6):
+        self.width, self.height, self.channels = width, height, channels
+        self.rows_written = 0
+        self.file = open(path, 'wb')
+        self.compressor = zlib.compressobj(compress_level)
+        self.pending = b''
+        self.file.write(PNG_SIGNATURE)
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8,
+                                         COLOR_TYPES[channels], 0, 0, 0))
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        self.file.write(struct.pack('>I', len(data)) + kind + data)
+        self.file.write(struct.pack('>I', zlib.crc32(kind + data)))
+
+    def write(self, band: np.ndarray) -> None:
+        """Ajoute les lignes de band (lignes, width) ou (lignes, width, 3), uint8"""
+        rows = band.reshape(band.shape[0], self.width*self.channels)
+        # Chaque ligne est précédée de son type de filtre (0 : aucun)
+        filtered = np.zeros((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 1:] = rows
+        self.pending += self.compressor.compress(filtered.tobytes())
+        self.rows_written += rows.shape[0]
+        self._flush(IDAT_SIZE)
+
+    def _flush(self, min_size: int) -> None:
+        while len(self.pending) >= max(min_size, 1):
+            self._chunk(b'IDAT', self.pending[:IDAT_SIZE])
+            self.pending = self.pending[IDAT_SIZE:]
+
+    def close(self) -> None:
+        assert self.rows_written == self.height, \
+            f"{self.rows_written} lignes écrites sur {self.height}"
+        self.pending += self.compressor.flush()
+        self._flush(0)
+        self._chunk(b'IEND', b'')
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
@@ -0,0 +1,84 @@
+"""
+Pyramide de tuiles d'une image en niveaux de gris stockée dans un fichier brut
+(uint8, height x width, lignes contiguës), construite en parallèle par tous les processus
+
+    level_path      : fichier brut du niveau k (le niveau 0 est l'image pleine résolution)
+    build_pyramid   : niveaux k+1 obtenus par moyenne 2x2 du niveau k, jusqu'à ce que
+                      l'image tienne dans une tuile, puis tuiles PNG de chaque niveau
+                      (<dossier>/<niveau>/<ligne>_<colonne>.png)
+
+Chaque processus lit et écrit ses bandes de lignes par np.memmap : aucun processus
+ne charge un niveau entier en mémoire.
+"""
+import numpy as np
+import os
+from PIL import Image
+
+# Côté (en pixels) des tuiles de la pyramide
+PYRAMID_TILE = 256
+# Lignes du niveau produit traitées à la fois par la réduction 2x2
+DOWNSAMPLE_BAND = 256
+
+
+def level_path(directory: str, level: int) -> str:
+    return os.path.join(directory, f"level_{level}.raw")
+
+
+def level_shapes(width: int, height: int, tile: int = PYRAMID_TILE) -> list:
+    """Dimensions (height, width) de chaque niveau, jusqu'à tenir dans une seule tuile"""
+    shapes = [(height, width)]
+    while max(shapes[-1]) > tile:
+        h, w = shapes[-1]
+        shapes.append((-(-h // 2), -(-w // 2)))
+    return shapes
+
+
+def downsample_band(src: np.ndarray, dst: np.ndarray, y0: int, y1: int) -> None:
+    """Lignes [y0, y1) de dst, moyenne des blocs 2x2 de src (bords impairs répliqués)"""
+    h, w = src.shape
+    rows = src[2*y0:min(2*y1, h)].astype(np.uint16)
+    if rows.shape[0] < 2*(y1 - y0):
+        rows = np.concatenate([rows, rows[-1:]])
+    if w % 2:
+        rows = np.concatenate([rows, rows[:, -1:]], axis=1)
+    total = rows[0::2, 0::2] + rows[1::2, 0::2] + rows[0::2, 1::2] + rows[1::2, 1::2]
+    dst[y0:y1] = (total + 2) // 4
+
+
+def build_pyramid(comm, directory: str, width: int, height: int,
+                  tile: int = PYRAMID_TILE) -> int:
+    """
+    Construit les niveaux 1, 2, ... à partir de level_path(directory, 0) puis écrit les
+    tuiles PNG de tous les niveaux ; les bandes et les lignes de tuiles sont réparties
+    cycliquement entre les processus. Renvoie le nombre de niveaux.
+    """
+    rank, size = comm.Get_rank(), comm.Get_size()
+    shapes = level_shapes(width, height, tile)
+    for level in range(1, len(shapes)):
+        if rank == 0:
+            with open(level_path(directory, level), 'wb') as f:
+                f.truncate(shapes[level][0]*shapes[level][1])
+        comm.Barrier()
+        src = np.memmap(level_path(directory, level - 1), dtype=np.uint8, mode='r',
+                        shape=shapes[level - 1])
+        dst = np.memmap(level_path(directory, level), dtype=np.uint8, mode='r+',
+                        shape=shapes[level])
+        bands = range(0, shapes[level][0], DOWNSAMPLE_BAND)
+        for y0 in bands[rank::size]:
+            downsample_band(src, dst, y0, min(y0 + DOWNSAMPLE_BAND, shapes[level][0]))
+        dst.flush()
+        del src, dst
+        comm.Barrier()
+
+    for level, shape in enumerate(shapes):
+        image = np.memmap(level_path(directory, level), dtype=np.uint8, mode='r', shape=shape)
+        os.makedirs(os.path.join(directory, str(level)), exist_ok=True)
+        tile_rows = range(0, shape[0], tile)
+        for ty, y0 in list(enumerate(tile_rows))[rank::size]:
+            band = np.array(image[y0:y0 + tile])
+            for tx, x0 in enumerate(range(0, shape[1], tile)):
+                Image.fromarray(band[:, x0:x0 + tile]).save(
+                    os.path.join(directory, str(level), f"{ty}_{tx}.png"))
+        del image
+    comm.Barrier()
+    return len(shapes)
@@ -1,74 +1,46 @@
 # Calcul de l'ensemble de Mandelbrot en python
+# L'image est calculée, colorée (table de couleurs uint8) et enregistrée par bandes de
+# lignes : la mémoire utilisée ne dépend que de la largeur de l'image et de --band
 import numpy as np
-from dataclasses import dataclass
-from PIL import Image
-from math import log
+import argparse
+import json
 from time import time
-import matplotlib.cm
-
-
-class MandelbrotSet:
-
-    def __init__(self, max_iterations : int, escape_radius : float = 2. ):
-        self.max_iterations = max_iterations
-        self.escape_radius  = escape_radius
-
-    def __contains__(self, c: complex) -> bool:
-        return self.stability(c) == 1
-
-    def convergence(self, c: np.ndarray, smooth=False, clamp=True) -> np.ndarray:
-        value = self.count_iterations(c, smooth)/self.max_iterations
-        return np.maximum(0.0, np.minimum(value, 1.0)) if clamp else value
-
-    def count_iterations(self, c: np.ndarray,  smooth=False) -> np.ndarray:
-        z:    np.ndarray
-        iter: np.ndarray
-
-        # On vérifie dans un premier temps si le complexe
-        # n'appartient pas à une zone de convergence connue :
-        #   1. Appartenance aux disques  C0{(0,0),1/4} et C1{(-1,0),1/4}
-        iter = self.max_iterations * np.ones(c.shape, dtype=np.double)
-        mask = (np.abs(c) >= 0.25) | (np.abs(c+1.) >= 0.25)
-        #  2.  Appartenance à la cardioïde {(1/4,0),1/2(1-cos(theta))}
-        #if (c.real > -0.75) and (c.real < 0.5):
-        #    ct = c.real-0.25 + 1.j * c.imag
-        #    ctnrm2 = abs(ct)
-        #    if ctnrm2 < 0.5*(1-ct.real/max(ctnrm2, 1.E-14)):
-        #        return self.max_iterations
-        # Sinon on itère
-        from scipy import linalg as slinalg
-        z = np.zeros(c.shape, dtype=np.complex128)
-        for it in range(self.max_iterations):
-            z[mask] = z[mask]*z[mask] + c[mask]
-            has_diverged = np.abs(z) > self.escape_radius
-            if has_diverged.size > 0:
-                iter[has_diverged] = np.minimum(iter[has_diverged], it)
-                mask = mask & ~has_diverged
-            if np.any(mask) == False : break
-        has_diverged = np.abs(z) > 2
-        if smooth:
-            iter[has_diverged] += 1 - np.log(np.log(np.abs(z[has_diverged])))/log(2)
-        return iter
+from mandelbrot_engine import MandelbrotSet, complex_grid, colormap_lut, apply_colormap
+from mandelbrot_png import PNGBandWriter
+
+parser = argparse.ArgumentParser(description="Ensemble de Mandelbrot en couleurs (plasma)")
+parser.add_argument('--width', type=int, default=1024)
+parser.add_argument('--height', type=int, default=1024)
+parser.add_argument('--max-iterations', type=int, default=200)
+parser.add_argument('--band', type=int, default=256, help='Lignes calculées et écrites à la fois')
+parser.add_argument('--lut-size', type=int, default=256, choices=[256, 4096],
+                    help='Nombre de couleurs de la table')
+args = parser.parse_args()
 
 # On peut changer les paramètres des deux prochaines lignes
-mandelbrot_set = MandelbrotSet(max_iterations=200, escape_radius=2.)
-width, height = 1024, 1024
+mandelbrot_set = MandelbrotSet(max_iterations=args.max_iterations, escape_radius=2.)
+width, height = args.width, args.height
 
 scaleX = 3./width
 scaleY = 2.25/height
-convergence = np.empty((width, height), dtype=np.double)
-# Calcul de l'ensemble de mandelbrot :
-deb = time()
-for y in range(height):
-    #for x in range(width):
-    c = np.array([complex(-2. + scaleX*x, -1.125 + scaleY * y) for x in range(width)])
-    convergence[:, y] = mandelbrot_set.convergence(c, smooth=True)
-fin = time()
-print(f"Temps du calcul de l'ensemble de Mandelbrot : {fin-deb}")
-
-# Constitution de l'image résultante :
-deb = time()
-image = Image.fromarray(np.uint8(matplotlib.cm.plasma(convergence.T)*255))
-fin = time()
-print(f"Temps de constitution de l'image : {fin-deb}")
-image.show()
+lut = colormap_lut('plasma', args.lut_size)
+convergence = np.empty((args.band, width), dtype=np.double)
+rgb = np.empty((args.band, width, 3), dtype=np.uint8)
+t_calc = t_image = 0.
+with PNGBandWriter("mandelbrot_vec.png", width, height) as writer:
+    for y in range(0, height, args.band):
+        rows = range(y, min(y + args.band, height))
+        # Calcul de l'ensemble de mandelbrot sur la bande :
+        deb = time()
+        c = complex_grid(rows, width, scaleX, scaleY)
+        mandelbrot_set.convergence_tile(c, smooth=True, out=convergence[:len(rows)])
+        fin = time()
+        t_calc += fin - deb
+        # Constitution et écriture de la bande de l'image résultante :
+        writer.write(apply_colormap(convergence[:len(rows)], lut, out=rgb[:len(rows)]))
+        t_image += time() - fin
+print(f"Temps du calcul de l'ensemble de Mandelbrot : {t_calc}")
+print(f"Points sortis par détection de cycle : {mandelbrot_set.nb_periodic}/{width*height}")
+print(f"Temps de constitution de l'image : {t_image}")
+# Mesure lue par bench_mandelbrot.py
+print("BENCH:" + json.dumps({"time": t_calc}))
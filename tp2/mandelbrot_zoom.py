@@ -0,0 +1,135 @@
+"""
+Animation de zoom dans l'ensemble de Mandelbrot
+
+Les images sont calculées en parallèle par un ProcessPoolExecutor et encodées en PNG par
+un thread d'écriture séparé : les processus de calcul n'attendent jamais Image.save.
+Au plus --in-flight images sont en cours de calcul et au plus --in-flight images attendent
+l'écriture, ce qui borne la mémoire utilisée quel que soit le nombre d'images.
+Les images sont écrites dans l'ordre (frame_0000.png, frame_0001.png, ...).
+
+La largeur de la vue décroît géométriquement de --start-scale à --end-scale.
+
+Usage :
+    python3 mandelbrot_zoom.py --frames 120 --end-scale 1e-8 --workers 4
+"""
+import numpy as np
+import argparse
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from time import time
+from mandelbrot_engine import MandelbrotSet, complex_grid, grayscale
+
+
+def view_widths(start: float, end: float, frames: int) -> np.ndarray:
+    """Largeurs des vues successives, en progression géométrique de start à end"""
+    return start * (end/start)**(np.arange(frames) / max(frames - 1, 1))
+
+
+def render_frame(mandelbrot_set: MandelbrotSet, center: complex, view_width: float,
+                 width: int, height: int) -> np.ndarray:
+    """Image (height, width) en niveaux de gris de la vue centrée en `center`"""
+    scale = view_width/width
+    c = complex_grid(range(height), width, scale, scale,
+                     center.real - 0.5*view_width, center.imag - 0.5*scale*height)
+    return grayscale(mandelbrot_set.convergence_tile(c, smooth=True))
+
+
+def write_frames(frames: queue.Queue, output_dir: str, stats: dict, errors: list) -> None:
+    """
+    Thread d'écriture : enregistre les images reçues jusqu'à la sentinelle None.
+    Une exception arrête le thread et est conservée dans errors
+    """
+    try:
+        while (item := frames.get()) is not None:
+            index, frame = item
+            t0 = time()
+            Image.fromarray(frame).save(os.path.join(output_dir, f"frame_{index:04d}.png"))
+            stats['write'] += time() - t0
+    except Exception as error:
+        errors.append(error)
+
+
+def put_frame(frames: queue.Queue, item, errors: list) -> None:
+    """
+    Met item dans la file d'écriture. Si le thread d'écriture s'est arrêté sur une
+    exception (la file ne se viderait plus), cette exception est relancée
+    """
+    while True:
+        if errors:
+            raise errors[0]
+        try:
+            frames.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+
+def main(args):
+    mandelbrot_set = MandelbrotSet(max_iterations=args.max_iterations, escape_radius=10)
+    center = complex(args.center_x, args.center_y)
+    widths = view_widths(args.start_scale, args.end_scale, args.frames)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    stats, errors = {'write': 0.}, []
+    to_write = queue.Queue(maxsize=args.in_flight)
+    # Thread démon : une exception du thread principal ne le laisse pas bloqué sur get()
+    writer = threading.Thread(target=write_frames, daemon=True,
+                              args=(to_write, args.output_dir, stats, errors))
+    writer.start()
+
+    deb = time()
+    t_blocked = 0.
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        pending = deque()
+        next_frame = 0
+        while next_frame < args.frames or pending:
+            # Au plus in_flight images en cours de calcul
+            while next_frame < args.frames and len(pending) < args.in_flight:
+                pending.append((next_frame, pool.submit(render_frame, mandelbrot_set, center,
+                                                        widths[next_frame], args.width,
+                                                        args.height)))
+                next_frame += 1
+            # La plus ancienne image part à l'écriture dès qu'elle est prête (ordre conservé)
+            index, future = pending.popleft()
+            frame = future.result()
+            t0 = time()
+            put_frame(to_write, (index, frame), errors)
+            t_blocked += time() - t0
+    put_frame(to_write, None, errors)
+    writer.join()
+    if errors:
+        raise errors[0]
+    fin = time()
+
+    print(f"{args.frames} images {args.width}x{args.height} en {fin-deb:.3f}s "
+          f"({args.frames/(fin-deb):.1f} images/s, {args.workers} processus de calcul)")
+    print(f"Écriture PNG : {stats['write']:.3f}s (thread séparé), "
+          f"attente de l'écriture : {t_blocked:.3f}s")
+    print(f"Images enregistrées dans {args.output_dir}/")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Animation de zoom dans l'ensemble de Mandelbrot")
+    parser.add_argument('--center-x', type=float, default=-0.743643887037158704752191506114774)
+    parser.add_argument('--center-y', type=float, default=0.131825904205311970493132056385139)
+    parser.add_argument('--start-scale', type=float, default=3., help='Largeur de la première vue')
+    parser.add_argument('--end-scale', type=float, default=1.E-6, help='Largeur de la dernière vue')
+    parser.add_argument('--frames', type=int, default=60, help="Nombre d'images")
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--max-iterations', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Nombre de processus de calcul')
+    parser.add_argument('--in-flight', type=int, default=None,
+                        help='Images en cours de calcul (par défaut 2 par processus)')
+    parser.add_argument('--output-dir', default='frames', help='Dossier des images')
+    args = parser.parse_args()
+    if args.in_flight is None:
+        args.in_flight = 2*args.workers
+    if args.in_flight < 1:
+        parser.error("--in-flight doit être au moins 1")
+    main(args)
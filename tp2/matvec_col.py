@@ -6,11 +6,19 @@ TP2 - Question 2.a
 """
 from mpi4py import MPI
 import numpy as np
+import argparse
 from time import time
+from mpi_trace import Tracer
+
+parser = argparse.ArgumentParser(description="Produit matrice-vecteur par colonnes")
+parser.add_argument('--trace', default=None, metavar='FICHIER',
+                    help="Trace d'exécution par processus (JSON, ui.perfetto.dev)")
+args = parser.parse_args()
 
 comm = MPI.COMM_WORLD
 rank = comm.Get_rank()
 size = comm.Get_size()
+tracer = Tracer(comm, enabled=args.trace is not None)
 
 # Dimension du problème (doit être divisible par size)
 dim = 1200  # Augmenté pour mieux mesurer le temps
@@ -42,7 +50,8 @@ u_local = np.array([j+1. for j in range(start_col, end_col)], dtype=np.double)
 
 # Calcul du produit partiel: A_local @ u_local donne un vecteur de taille dim
 deb = time()
-v_partial = A_local @ u_local  # Produit de (dim x N_loc) par (N_loc,) = (dim,)
+with tracer.span('compute'):
+    v_partial = A_local @ u_local  # Produit de (dim x N_loc) par (N_loc,) = (dim,)
 fin = time()
 
 local_time = fin - deb
@@ -50,7 +59,8 @@ local_time = fin - deb
 # Réduction pour sommer toutes les contributions partielles
 # Chaque processus a une somme partielle, on les additionne
 v = np.zeros(dim, dtype=np.double)
-comm.Allreduce(v_partial, v, op=MPI.SUM)
+with tracer.span('collective', 'Allreduce'):
+    comm.Allreduce(v_partial, v, op=MPI.SUM)
 
 # Collecte du temps maximum
 max_time = comm.reduce(local_time, op=MPI.MAX, root=0)
@@ -81,3 +91,5 @@ if rank == 0:
         print("✓ Tous les processus ont le même résultat")
     else:
         print("✗ Incohérence entre processus!")
+
+tracer.save(args.trace, f"matvec_col ({size} processus)")
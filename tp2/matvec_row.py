@@ -6,11 +6,19 @@ TP2 - Question 2.b
 """
 from mpi4py import MPI
 import numpy as np
+import argparse
 from time import time
+from mpi_trace import Tracer
+
+parser = argparse.ArgumentParser(description="Produit matrice-vecteur par lignes")
+parser.add_argument('--trace', default=None, metavar='FICHIER',
+                    help="Trace d'exécution par processus (JSON, ui.perfetto.dev)")
+args = parser.parse_args()
 
 comm = MPI.COMM_WORLD
 rank = comm.Get_rank()
 size = comm.Get_size()
+tracer = Tracer(comm, enabled=args.trace is not None)
 
 # Dimension du problème (doit être divisible par size)
 dim = 1200
@@ -41,14 +49,16 @@ u = np.array([j+1. for j in range(dim)], dtype=np.double)
 
 # Calcul du produit partiel: A_local @ u donne N_loc éléments du résultat
 deb = time()
-v_local = A_local @ u  # Produit de (N_loc x dim) par (dim,) = (N_loc,)
+with tracer.span('compute'):
+    v_local = A_local @ u  # Produit de (N_loc x dim) par (dim,) = (N_loc,)
 fin = time()
 
 local_time = fin - deb
 
 # Rassemblement du résultat complet sur tous les processus
 v = np.zeros(dim, dtype=np.double)
-comm.Allgather(v_local, v)
+with tracer.span('collective', 'Allgather'):
+    comm.Allgather(v_local, v)
 
 # Collecte du temps maximum
 max_time = comm.reduce(local_time, op=MPI.MAX, root=0)
@@ -79,3 +89,5 @@ if rank == 0:
         print("✓ Tous les processus ont le même résultat")
     else:
         print("✗ Incohérence entre processus!")
+
+tracer.save(args.trace, f"matvec_row ({size} processus)")
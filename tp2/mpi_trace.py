@@ -0,0 +1,164 @@
+"""
+Trace d'exécution d'un programme MPI, processus par processus, au format Chrome trace
+(à ouvrir dans ui.perfetto.dev ou chrome://tracing : une ligne par rang)
+
+Chaque processus enregistre des intervalles (début, fin) mesurés par MPI.Wtime dans un
+tableau préalloué, sans allocation ni communication pendant le calcul ; save() les
+rassemble sur le processus 0 (Gatherv) et écrit le fichier JSON. Catégories :
+compute, send, recv, exchange (envoi et réception couplés, Sendrecv ou échange de
+cellules fantômes), collective, wait.
+
+    tracer = Tracer(comm, enabled=args.trace is not None)
+    with tracer.span('compute'):
+        ...
+    with tracer.span('collective', 'Gatherv'):
+        comm.Gatherv(...)
+    tracer.save(args.trace)
+
+Dans une boucle déjà chronométrée par MPI.Wtime, record(tracer.name_id(...), début, fin)
+évite le coût du contexte (quelques µs par intervalle).
+
+Un traceur désactivé renvoie un contexte vide : le coût d'instrumentation est un appel
+de méthode. Les intervalles ne sont enregistrés que par le thread principal.
+
+Les TP1 et TP4 l'importent en ajoutant le répertoire tp2 à sys.path (pas de lien
+symbolique : Git pour Windows les extrait en fichiers texte par défaut).
+"""
+from mpi4py import MPI
+import numpy as np
+import json
+
+CATEGORIES = ('compute', 'send', 'recv', 'exchange', 'collective', 'wait')
+# Nombre d'intervalles conservés par processus (au-delà, ils sont comptés et perdus)
+DEFAULT_CAPACITY = 1 << 16
+
+
+class _Span:
+    __slots__ = ('tracer', 'name_id', 'begin')
+
+    def __init__(self, tracer, name_id):
+        self.tracer, self.name_id = tracer, name_id
+
+    def __enter__(self):
+        self.begin = MPI.Wtime()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name_id, self.begin, MPI.Wtime())
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """
+    Intervalles (nom, début, fin) d'un processus de comm. Les temps sont relatifs à une
+    origine prise juste après une barrière commune (horloges MPI.Wtime non globales).
+    """
+    def __init__(self, comm, enabled: bool = True, capacity: int = DEFAULT_CAPACITY):
+        self.comm = comm
+        self.enabled = enabled
+        # Triplets (identifiant du nom, début, fin) à plat : trois affectations de scalaires
+        # coûtent moins qu'une affectation de ligne
+        self.capacity = capacity if enabled else 0
+        self.events = np.empty(3*self.capacity, dtype=np.double)
+        self.nb_events = 0
+        self.nb_dropped = 0
+        # (catégorie, nom) de chaque identifiant stocké dans la colonne 0 de events
+        self.names = []
+        self._ids = {}
+        if enabled:
+            comm.Barrier()
+        self.origin = MPI.Wtime()
+
+    def name_id(self, category: str, name: str = None) -> int:
+        """Identifiant d'un nom d'intervalle, pour record() dans une boucle déjà chronométrée"""
+        name_id = self._ids.get((category, name))
+        if name_id is None:
+            assert category in CATEGORIES, f"catégorie inconnue : {category}"
+            name_id = self._ids[category, name] = len(self.names)
+            self.names.append((category, name or category))
+        return name_id
+
+    def span(self, category: str, name: str = None):
+        """Contexte enregistrant un intervalle de la catégorie (nom : catégorie par défaut)"""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, self.name_id(category, name))
+
+    def record(self, name_id: int, begin: float, end: float) -> None:
+        """Enregistre un intervalle [begin, end] mesuré par MPI.Wtime (ignoré si désactivé)"""
+        n = self.nb_events
+        if n < self.capacity:
+            events = self.events
+            events[3*n] = name_id
+            events[3*n + 1] = begin
+            events[3*n + 2] = end
+            self.nb_events = n + 1
+        else:
+            self.nb_dropped += 1
+
+    def _local_events(self) -> np.ndarray:
+        """Intervalles enregistrés (nb_events, 3), temps relatifs à l'origine"""
+        events = self.events[:3*self.nb_events].reshape(-1, 3).copy()
+        events[:, 1:] -= self.origin
+        return events
+
+    def totals(self) -> dict:
+        """Durée cumulée (s) de chaque catégorie sur ce processus"""
+        events = self._local_events()
+        durations = {category: 0. for category in CATEGORIES}
+        for name_id, (category, _) in enumerate(self.names):
+            mask = events[:, 0] == name_id
+            durations[category] += float(np.sum(events[mask, 2] - events[mask, 1]))
+        return durations
+
+    def save(self, path: str, process_name: str = 'MPI') -> None:
+        """
+        Collectif : rassemble les intervalles de tous les processus sur le processus 0,
+        qui écrit la trace JSON dans path et affiche le temps par catégorie et par rang
+        """
+        if not self.enabled:
+            return
+        comm = self.comm
+        rank, size = comm.Get_rank(), comm.Get_size()
+        counts = np.array(comm.allgather(self.nb_events*3), dtype=np.int64)
+        names = comm.gather(self.names, root=0)
+        totals = comm.gather(self.totals(), root=0)
+        dropped = comm.reduce(self.nb_dropped, op=MPI.SUM, root=0)
+        if rank == 0:
+            events = np.empty(counts.sum(), dtype=np.double)
+            displacements = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            recvbuf = [events, counts, displacements, MPI.DOUBLE]
+        else:
+            recvbuf = None
+        comm.Gatherv(self._local_events(), recvbuf, root=0)
+        if rank != 0:
+            return
+
+        trace = [{'name': 'process_name', 'ph': 'M', 'pid': 0, 'args': {'name': process_name}}]
+        for r in range(size):
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': r,
+                          'args': {'name': f"rang {r}"}})
+            local = events[displacements[r]:displacements[r] + counts[r]].reshape(-1, 3)
+            for name_id, begin, end in local:
+                category, name = names[r][int(name_id)]
+                trace.append({'name': name, 'cat': category, 'ph': 'X', 'pid': 0, 'tid': r,
+                              'ts': begin*1e6, 'dur': (end - begin)*1e6})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+        print(f"\nTrace : {path} ({counts.sum()//3} intervalles"
+              + (f", {dropped} perdus : augmenter capacity" if dropped else "") + ")")
+        print(f"{'rang':>5}" + "".join(f"{c:>12}" for c in CATEGORIES))
+        for r in range(size):
+            print(f"{r:>5}" + "".join(f"{totals[r][c]:>11.4f}s" for c in CATEGORIES))
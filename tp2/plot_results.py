@@ -1,12 +1,27 @@
 #!/usr/bin/env python3
 """
 Script de visualisation des résultats du TP2
-Génère des graphiques de performance à partir des données expérimentales
+Génère des graphiques de performance à partir des mesures de bench_mandelbrot.py
+(results/bench_mandelbrot.json : médiane et IQR de chaque stratégie)
+
+Usage :
+    python3 plot_results.py
+    python3 plot_results.py --input results/bench_mandelbrot.json --size 2048 --iterations 200
 """
 
 import matplotlib.pyplot as plt
 import numpy as np
+import argparse
+import json
 import os
+import sys
+
+parser = argparse.ArgumentParser(description="Graphiques des résultats Mandelbrot")
+parser.add_argument('--input', default='results/bench_mandelbrot.json',
+                    help="Résultats écrits par bench_mandelbrot.py")
+parser.add_argument('--size', type=int, default=1024, help="Côté de l'image retenue")
+parser.add_argument('--iterations', type=int, default=50, help="max_iterations retenu")
+args = parser.parse_args()
 
 # Créer le répertoire plots s'il n'existe pas
 os.makedirs('plots', exist_ok=True)
@@ -19,27 +34,49 @@ plt.rcParams['axes.labelsize'] = 12
 plt.rcParams['axes.titlesize'] = 14
 plt.rcParams['legend.fontsize'] = 10
 
-# Données expérimentales (extraites de tp2_results_20260127_110003.txt)
-processes = np.array([1, 2, 4, 8])
+# Données expérimentales : enregistrements de la taille et du nombre d'itérations retenus,
+# indexés par (stratégie, nombre de processus)
+with open(args.input) as f:
+    records = {(r['strategy'], r['nprocs']): r for r in json.load(f)['records']
+               if r['width'] == args.size and r['max_iterations'] == args.iterations}
+missing = [s for s in ('seq', 'block', 'cyclic', 'master_slave')
+           if not any(strategy == s for strategy, _ in records)]
+if missing:
+    print(f"ERREUR: aucune mesure {', '.join(missing)} pour {args.size}x{args.size}, "
+          f"{args.iterations} itérations dans {args.input}")
+    sys.exit(1)
+
+
+def strategy_times(strategy):
+    """Nombres de processus, médianes et quartiles (q1, q3) mesurés pour une stratégie"""
+    procs = sorted(p for s, p in records if s == strategy)
+    rows = [records[strategy, p] for p in procs]
+    return (np.array(procs), np.array([r['median'] for r in rows]),
+            np.array([[r['q1'] for r in rows], [r['q3'] for r in rows]]))
+
 
 # Temps de référence séquentiel
-t_seq = 1.289
+t_seq = records['seq', 1]['median']
+# Version vectorisée (numpy, 1 processus), tracée en référence horizontale si mesurée
+t_vec = records['vec', 1]['median'] if ('vec', 1) in records else None
+vec_speedup = t_seq / t_vec if t_vec is not None else None
 
 # Mandelbrot - Partition par blocs
-block_times = np.array([1.312, 0.708, 0.415, 0.247])
+processes, block_times, block_quartiles = strategy_times('block')
 block_speedup = t_seq / block_times
 block_efficiency = (block_speedup / processes) * 100
 
 # Mandelbrot - Répartition cyclique
-cyclic_times = np.array([1.280, 0.698, 0.362, 0.210])
+cyclic_processes, cyclic_times, cyclic_quartiles = strategy_times('cyclic')
+assert np.array_equal(cyclic_processes, processes), "block et cyclique : mêmes nombres de processus"
 cyclic_speedup = t_seq / cyclic_times
 cyclic_efficiency = (cyclic_speedup / processes) * 100
 
-# Mandelbrot - Maître-Esclave (seulement 2, 4, 8 processus)
-ms_processes = np.array([2, 4, 8])
-ms_times = np.array([1.269, 0.453, 0.224])
+# Mandelbrot - Maître-Esclave (au moins 2 processus)
+ms_processes, ms_times, ms_quartiles = strategy_times('master_slave')
 ms_speedup = t_seq / ms_times
 ms_efficiency = (ms_speedup / ms_processes) * 100
+p_max = processes[-1]
 
 # Speedup idéal
 ideal_speedup = processes
@@ -53,29 +90,32 @@ plt.plot(processes, ideal_speedup, 'k--', linewidth=2, label='Idéal (linéaire)
 plt.plot(processes, block_speedup, 'o-', linewidth=2, markersize=8, label='Block', color='#e74c3c')
 plt.plot(processes, cyclic_speedup, 's-', linewidth=2, markersize=8, label='Cyclique', color='#3498db')
 plt.plot(ms_processes, ms_speedup, '^-', linewidth=2, markersize=8, label='Maître-Esclave', color='#2ecc71')
+if vec_speedup is not None:
+    plt.axhline(y=vec_speedup, color='#9b59b6', linestyle=':', linewidth=2,
+                label=f'Vectorisée, 1 processus ({vec_speedup:.2f}×)')
 
 plt.xlabel('Nombre de processus', fontweight='bold')
 plt.ylabel('Speedup', fontweight='bold')
-plt.title('Comparaison des Speedups - Ensemble de Mandelbrot', fontweight='bold', pad=15)
+plt.title(f'Comparaison des Speedups - Mandelbrot {args.size}x{args.size}, {args.iterations} itérations', fontweight='bold', pad=15)
 plt.legend(loc='upper left', framealpha=0.9)
 plt.grid(True, alpha=0.3)
-plt.xlim(0.5, 8.5)
-plt.ylim(0, 9)
+plt.xlim(0.5, p_max + 0.5)
+plt.ylim(0, max(p_max + 1, 1.1*(vec_speedup or 0)))
 plt.xticks(processes)
 
 # Annotations pour les valeurs finales
 for i, (p, s) in enumerate(zip(processes, block_speedup)):
-    if p == 8:
+    if p == p_max:
         plt.annotate(f'{s:.2f}×', (p, s), textcoords="offset points", 
                     xytext=(10,-5), fontsize=9, color='#e74c3c')
 
 for i, (p, s) in enumerate(zip(processes, cyclic_speedup)):
-    if p == 8:
+    if p == p_max:
         plt.annotate(f'{s:.2f}×', (p, s), textcoords="offset points", 
                     xytext=(10,5), fontsize=9, color='#3498db', fontweight='bold')
 
 for i, (p, s) in enumerate(zip(ms_processes, ms_speedup)):
-    if p == 8:
+    if p == p_max:
         plt.annotate(f'{s:.2f}×', (p, s), textcoords="offset points", 
                     xytext=(10,5), fontsize=9, color='#2ecc71')
 
@@ -100,16 +140,16 @@ plt.plot(ms_processes, ms_efficiency, '^-', linewidth=2, markersize=8,
 
 plt.xlabel('Nombre de processus', fontweight='bold')
 plt.ylabel('Efficacité (%)', fontweight='bold')
-plt.title('Comparaison des Efficacités - Ensemble de Mandelbrot', fontweight='bold', pad=15)
+plt.title(f'Comparaison des Efficacités - Mandelbrot {args.size}x{args.size}, {args.iterations} itérations', fontweight='bold', pad=15)
 plt.legend(loc='upper right', framealpha=0.9)
 plt.grid(True, alpha=0.3)
-plt.xlim(0.5, 8.5)
+plt.xlim(0.5, p_max + 0.5)
 plt.ylim(0, 110)
 plt.xticks(processes)
 
 # Annotations
 for i, (p, e) in enumerate(zip(processes, cyclic_efficiency)):
-    if p == 8:
+    if p == p_max:
         plt.annotate(f'{e:.1f}%', (p, e), textcoords="offset points", 
                     xytext=(10,5), fontsize=9, color='#3498db', fontweight='bold')
 
@@ -126,13 +166,23 @@ plt.figure(figsize=(10, 6))
 x = np.arange(len(processes))
 width = 0.25
 
-plt.bar(x - width, block_times, width, label='Block', color='#e74c3c', alpha=0.8)
-plt.bar(x, cyclic_times, width, label='Cyclique', color='#3498db', alpha=0.8)
-plt.bar(x[1:] + width, ms_times, width, label='Maître-Esclave', color='#2ecc71', alpha=0.8)
+# Position des barres maître-esclave parmi les nombres de processus mesurés
+ms_x = np.searchsorted(processes, ms_processes)
+
+# Barres d'erreur : premier et troisième quartiles autour de la médiane
+plt.bar(x - width, block_times, width, yerr=np.abs(block_quartiles - block_times), capsize=3,
+        label='Block', color='#e74c3c', alpha=0.8)
+plt.bar(x, cyclic_times, width, yerr=np.abs(cyclic_quartiles - cyclic_times), capsize=3,
+        label='Cyclique', color='#3498db', alpha=0.8)
+plt.bar(ms_x + width, ms_times, width, yerr=np.abs(ms_quartiles - ms_times), capsize=3,
+        label='Maître-Esclave', color='#2ecc71', alpha=0.8)
+if t_vec is not None:
+    plt.axhline(y=t_vec, color='#9b59b6', linestyle=':', linewidth=2,
+                label=f'Vectorisée, 1 processus ({t_vec:.3f}s)')
 
 plt.xlabel('Nombre de processus', fontweight='bold')
 plt.ylabel('Temps d\'exécution (s)', fontweight='bold')
-plt.title('Temps d\'exécution - Ensemble de Mandelbrot', fontweight='bold', pad=15)
+plt.title(f'Temps d\'exécution (médiane, IQR) - Mandelbrot {args.size}x{args.size}', fontweight='bold', pad=15)
 plt.xticks(x, processes)
 plt.legend(framealpha=0.9)
 plt.grid(True, alpha=0.3, axis='y')
@@ -143,8 +193,8 @@ for i, (t, p) in enumerate(zip(block_times, processes)):
     plt.text(i - width, t, f'{t:.3f}s', ha='center', va='bottom', fontsize=8)
 for i, (t, p) in enumerate(zip(cyclic_times, processes)):
     plt.text(i, t, f'{t:.3f}s', ha='center', va='bottom', fontsize=8, fontweight='bold')
-for i, (t, p) in enumerate(zip(ms_times, ms_processes)):
-    plt.text(i + 1 + width, t, f'{t:.3f}s', ha='center', va='bottom', fontsize=8)
+for i, t in zip(ms_x, ms_times):
+    plt.text(i + width, t, f'{t:.3f}s', ha='center', va='bottom', fontsize=8)
 
 plt.tight_layout()
 plt.savefig('plots/mandelbrot_execution_time.png', dpi=300, bbox_inches='tight')
@@ -152,68 +202,69 @@ print("✓ Graphique sauvegardé: plots/mandelbrot_execution_time.png")
 plt.close()
 
 # ============================================================================
-# Graphique 4 : Équilibrage de charge (8 processus)
+# Graphique 4 : Équilibrage de charge (p_max processus)
 # ============================================================================
-# Données des temps de calcul locaux pour 8 processus
-block_8p_times = np.array([0.1796, 0.2466, 0.1723, 0.1624, 0.1615, 0.1974, 0.2084, 0.1807])
-cyclic_8p_times = np.array([0.1841, 0.2045, 0.2102, 0.1823, 0.1746, 0.1832, 0.1784, 0.1811])
+# Temps de calcul locaux de la mesure médiane
+block_local_times = np.array(records['block', p_max]['local_times'])
+cyclic_local_times = np.array(records['cyclic', p_max]['local_times'])
+y_top = 1.1 * max(block_local_times.max(), cyclic_local_times.max())
 
 fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
 
-processes_8 = np.arange(8)
+ranks = np.arange(p_max)
 
 # Block
-ax1.bar(processes_8, block_8p_times, color='#e74c3c', alpha=0.7, edgecolor='black')
-ax1.axhline(y=np.mean(block_8p_times), color='blue', linestyle='--', 
-            linewidth=2, label=f'Moyenne: {np.mean(block_8p_times):.3f}s')
-ax1.axhline(y=np.max(block_8p_times), color='red', linestyle=':', 
-            linewidth=2, label=f'Max: {np.max(block_8p_times):.3f}s')
+ax1.bar(ranks, block_local_times, color='#e74c3c', alpha=0.7, edgecolor='black')
+ax1.axhline(y=np.mean(block_local_times), color='blue', linestyle='--', 
+            linewidth=2, label=f'Moyenne: {np.mean(block_local_times):.3f}s')
+ax1.axhline(y=np.max(block_local_times), color='red', linestyle=':', 
+            linewidth=2, label=f'Max: {np.max(block_local_times):.3f}s')
 ax1.set_xlabel('Processus', fontweight='bold')
 ax1.set_ylabel('Temps de calcul (s)', fontweight='bold')
 ax1.set_title('Partition par Blocs', fontweight='bold')
-ax1.set_xticks(processes_8)
-ax1.set_xticklabels([f'P{i}' for i in range(8)])
+ax1.set_xticks(ranks)
+ax1.set_xticklabels([f'P{i}' for i in range(p_max)])
 ax1.legend()
 ax1.grid(True, alpha=0.3, axis='y')
-ax1.set_ylim(0, 0.27)
+ax1.set_ylim(0, y_top)
 
 # Annotations
-for i, t in enumerate(block_8p_times):
-    ax1.text(i, t + 0.005, f'{t:.3f}', ha='center', fontsize=8)
+for i, t in enumerate(block_local_times):
+    ax1.text(i, t + 0.02*y_top, f'{t:.3f}', ha='center', fontsize=8)
 
 # Écart-type
-std_block = np.std(block_8p_times)
-ax1.text(0.5, 0.25, f'σ = {std_block:.3f}s', fontsize=10, 
+std_block = np.std(block_local_times)
+ax1.text(0.5, 0.93*y_top, f'σ = {std_block:.3f}s', fontsize=10, 
          bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
 
 # Cyclique
-ax2.bar(processes_8, cyclic_8p_times, color='#3498db', alpha=0.7, edgecolor='black')
-ax2.axhline(y=np.mean(cyclic_8p_times), color='blue', linestyle='--', 
-            linewidth=2, label=f'Moyenne: {np.mean(cyclic_8p_times):.3f}s')
-ax2.axhline(y=np.max(cyclic_8p_times), color='red', linestyle=':', 
-            linewidth=2, label=f'Max: {np.max(cyclic_8p_times):.3f}s')
+ax2.bar(ranks, cyclic_local_times, color='#3498db', alpha=0.7, edgecolor='black')
+ax2.axhline(y=np.mean(cyclic_local_times), color='blue', linestyle='--', 
+            linewidth=2, label=f'Moyenne: {np.mean(cyclic_local_times):.3f}s')
+ax2.axhline(y=np.max(cyclic_local_times), color='red', linestyle=':', 
+            linewidth=2, label=f'Max: {np.max(cyclic_local_times):.3f}s')
 ax2.set_xlabel('Processus', fontweight='bold')
 ax2.set_ylabel('Temps de calcul (s)', fontweight='bold')
 ax2.set_title('Répartition Cyclique', fontweight='bold')
-ax2.set_xticks(processes_8)
-ax2.set_xticklabels([f'P{i}' for i in range(8)])
+ax2.set_xticks(ranks)
+ax2.set_xticklabels([f'P{i}' for i in range(p_max)])
 ax2.legend()
 ax2.grid(True, alpha=0.3, axis='y')
-ax2.set_ylim(0, 0.27)
+ax2.set_ylim(0, y_top)
 
 # Annotations
-for i, t in enumerate(cyclic_8p_times):
-    ax2.text(i, t + 0.005, f'{t:.3f}', ha='center', fontsize=8)
+for i, t in enumerate(cyclic_local_times):
+    ax2.text(i, t + 0.02*y_top, f'{t:.3f}', ha='center', fontsize=8)
 
 # Écart-type
-std_cyclic = np.std(cyclic_8p_times)
-ax2.text(0.5, 0.25, f'σ = {std_cyclic:.3f}s', fontsize=10, 
+std_cyclic = np.std(cyclic_local_times)
+ax2.text(0.5, 0.93*y_top, f'σ = {std_cyclic:.3f}s', fontsize=10, 
          bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.5))
 
-plt.suptitle('Équilibrage de charge - 8 processus', fontsize=14, fontweight='bold', y=1.02)
+plt.suptitle(f'Équilibrage de charge - {p_max} processus', fontsize=14, fontweight='bold', y=1.02)
 plt.tight_layout()
-plt.savefig('plots/load_balance_comparison_8proc.png', dpi=300, bbox_inches='tight')
-print("✓ Graphique sauvegardé: plots/load_balance_comparison_8proc.png")
+plt.savefig(f'plots/load_balance_comparison_{p_max}proc.png', dpi=300, bbox_inches='tight')
+print(f"✓ Graphique sauvegardé: plots/load_balance_comparison_{p_max}proc.png")
 plt.close()
 
 # ============================================================================
@@ -223,25 +274,28 @@ print("\n" + "="*70)
 print("RÉSUMÉ DES PERFORMANCES - ENSEMBLE DE MANDELBROT")
 print("="*70)
 
-print("\n📊 SPEEDUPS (8 processus):")
+print(f"\n📐 {args.size}x{args.size}, {args.iterations} itérations, référence séquentielle "
+      f"{t_seq:.3f}s (IQR {records['seq', 1]['iqr']:.3f}s)")
+
+print(f"\n📊 SPEEDUPS ({p_max} processus):")
 print(f"  • Block:         {block_speedup[-1]:.2f}× (efficacité: {block_efficiency[-1]:.1f}%)")
-print(f"  • Cyclique:      {cyclic_speedup[-1]:.2f}× (efficacité: {cyclic_efficiency[-1]:.1f}%) ⭐")
+print(f"  • Cyclique:      {cyclic_speedup[-1]:.2f}× (efficacité: {cyclic_efficiency[-1]:.1f}%)")
 print(f"  • Maître-Esclave: {ms_speedup[-1]:.2f}× (efficacité: {ms_efficiency[-1]:.1f}%)")
+if vec_speedup is not None:
+    print(f"  • Vectorisée:    {vec_speedup:.2f}× (1 processus, {t_vec:.3f}s)")
 
-print("\n⚡ TEMPS D'EXÉCUTION (8 processus):")
-print(f"  • Block:         {block_times[-1]:.3f}s")
-print(f"  • Cyclique:      {cyclic_times[-1]:.3f}s ⭐ (le plus rapide)")
-print(f"  • Maître-Esclave: {ms_times[-1]:.3f}s")
+print(f"\n⚡ TEMPS D'EXÉCUTION (médiane ± IQR/2, {p_max} processus):")
+for name, strategy in (('Block', 'block'), ('Cyclique', 'cyclic'), ('Maître-Esclave', 'master_slave')):
+    r = records[strategy, p_max]
+    print(f"  • {name + ':':<15} {r['median']:.3f}s ± {r['iqr']/2:.3f}s ({r['repeat']} mesures)")
 
-print("\n⚖️  ÉQUILIBRAGE DE CHARGE (écart-type, 8 processus):")
+print(f"\n⚖️  ÉQUILIBRAGE DE CHARGE (écart-type, {p_max} processus):")
 print(f"  • Block:    σ = {std_block:.3f}s")
-print(f"  • Cyclique: σ = {std_cyclic:.3f}s ⭐ (réduction de {(1-std_cyclic/std_block)*100:.1f}%)")
+print(f"  • Cyclique: σ = {std_cyclic:.3f}s")
 
+best = min((block_times[-1], 'Block'), (cyclic_times[-1], 'Cyclique'), (ms_times[-1], 'Maître-Esclave'))
 print("\n🏆 CONCLUSION:")
-print("  La répartition cyclique est la stratégie la plus performante:")
-print("  - Meilleur speedup (6.10×)")
-print("  - Temps d'exécution le plus court (0.210s)")
-print("  - Meilleur équilibrage de charge (σ = 0.012s)")
-
+print(f"  Stratégie la plus rapide à {p_max} processus : {best[1]} "
+      f"({best[0]:.3f}s, speedup {t_seq/best[0]:.2f}×)")
 print("\n✅ Tous les graphiques ont été générés avec succès dans le dossier 'plots/'")
 print("="*70)
@@ -68,6 +68,12 @@ echo ""
         echo ""
     done
 
+    # 1.4 Benchmark de toutes les stratégies (médiane et IQR sur 5 mesures)
+    echo "--- 1.4 Benchmark (results/bench_mandelbrot.json/.csv) ---"
+    python3 bench_mandelbrot.py --procs 1 2 4 8 --repeat 5 --mpi-args "$MPI_OPTS"
+    python3 plot_results.py
+    echo ""
+
     # === Partie 2 : Produit Matrice-Vecteur ===
     echo ""
     echo "########################################"
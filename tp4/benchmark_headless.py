@@ -14,6 +14,22 @@ Usage :
     # Tous les tests (lance automatiquement np=2,3,4,5,9)
     python3 benchmark_headless.py --run-all --steps 500 --pattern glider_gun
 
+    # Moteur de calcul : stencil sans allocation (par défaut) ou np.roll du cours
+    mpirun -np 1 python3 benchmark_headless.py --steps 500 --pattern block_switch_engine --engine roll
+
+    # Grille compactée (64 cellules par uint64), grille aléatoire de 10000x10000
+    mpirun -np 4 python3 benchmark_headless.py --steps 50 --random 10000 --engine bitpacked
+
+    # Régions actives : seules les tuiles modifiées et leurs voisines sont recalculées
+    # (planeur seul sur un tore de 4000x4000)
+    mpirun -np 1 python3 benchmark_headless.py --steps 500 --pattern glider --torus 4000 --engine active
+
+    # Découpage 2D par blocs (Create_cart, 8 voisins) au lieu de bandes de lignes
+    mpirun -np 4 python3 benchmark_headless.py --steps 50 --random 4000 --decomposition cart
+
+    # Trace par processus (calcul, cellules fantômes, Gatherv) pour ui.perfetto.dev
+    mpirun -np 4 python3 benchmark_headless.py --steps 500 --trace trace_gol.json
+
 Note : le processus de rang 0 est toujours le contrôleur (pas de calcul),
 donc np=2 → 1 worker, np=3 → 2 workers, np=5 → 4 workers, np=9 → 8 workers.
 """
@@ -25,14 +41,49 @@ import argparse
 import subprocess
 import csv
 import os
+# Traceur MPI partagé avec le TP2
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tp2'))
+from mpi_trace import Tracer
+from life_engine import ENGINES, LifeStencil, BitLife, ActiveLife, pack_cells, roll_step
+from life_cart import CartDecomposition
 
 
-class GrilleHeadless:
+class Generations:
+    """
+    Calcul des générations d'une grille self.cells par le moteur choisi (life_engine).
+    Avec 'bitpacked', self.cells est compactée (lignes, mots uint64) : les lignes
+    fantômes échangées et la grille rassemblée sont 8 fois plus petites.
+    Avec 'active', seules les tuiles modifiées à la génération précédente et leurs
+    voisines sont recalculées (ghost_rows, ghost_columns : lignes, colonnes 0 et -1
+    écrites par l'échange).
+    """
+    def init_engine(self, engine, ghost_rows=False, ghost_columns=False):
+        self.engine = engine
+        if engine == 'bitpacked':
+            self.kernel = BitLife(self.cells.shape)
+            self.cells = pack_cells(self.cells)
+        elif engine == 'active':
+            self.kernel = ActiveLife(self.cells.shape, ghost_rows=ghost_rows,
+                                     ghost_columns=ghost_columns)
+        else:
+            self.kernel = LifeStencil(self.cells.shape)
+        # Double tampon : la génération suivante est écrite puis échangée
+        self.next_cells = np.empty_like(self.cells)
+
+    def compute_next_iteration(self):
+        if self.engine == 'roll':
+            self.cells, _ = roll_step(self.cells)
+        else:
+            self.kernel.step(self.cells, self.next_cells)
+            self.cells, self.next_cells = self.next_cells, self.cells
+
+
+class GrilleHeadless(Generations):
     """
     Version headless de la Grille (sans pygame).
     Identique au code du cours mais sans dépendance pygame.
     """
-    def __init__(self, rank: int, nbp: int, dim, init_pattern=None):
+    def __init__(self, rank: int, nbp: int, dim, init_pattern=None, engine='stencil'):
         self.dimensions = dim
         self.dimensions_loc = (dim[0]//nbp + (1 if rank < dim[0]%nbp else 0), dim[1])
         self.start_loc = rank * self.dimensions_loc[0] + (dim[0]%nbp if rank >= dim[0]%nbp else 0)
@@ -47,16 +98,14 @@ class GrilleHeadless:
                 self.cells[indices_i, indices_j] = 1
         else:
             self.cells = np.random.randint(2, size=(self.dimensions_loc[0]+2, dim[1]), dtype=np.uint8)
+        self.init_engine(engine, ghost_rows=True)
+        # Grille rassemblée (lignes éventuellement compactées) et nombre d'éléments par rang
+        self.glob_shape = (dim[0], self.cells.shape[1])
+        self.sendcounts = np.array([(dim[0]//nbp + (1 if r < dim[0]%nbp else 0)) * self.cells.shape[1]
+                                    for r in range(nbp)])
 
-    def compute_next_iteration(self):
-        """Calcule la prochaine génération (identique au code du cours)."""
-        neighbours_count = sum(
-            np.roll(np.roll(self.cells, i, 0), j, 1)
-            for i in (-1, 0, 1) for j in (-1, 0, 1) if (i != 0 or j != 0)
-        )
-        next_cells = (neighbours_count == 3) | (self.cells & (neighbours_count == 2))
-        self.cells = next_cells
-        return None
+    def gather(self, comm, grid_glob):
+        comm.Gatherv(self.cells[1:-1, :], [grid_glob, self.sendcounts], root=0)
 
     def update_ghost_cells(self, comm):
         """Met à jour les cellules fantômes (identique au code du cours)."""
@@ -68,12 +117,34 @@ class GrilleHeadless:
         req2.Wait()
 
 
-class GrilleSerial:
+class GrilleCart(Generations):
+    """
+    Bloc local d'un découpage 2D (life_cart.CartDecomposition) : couronne de cellules
+    fantômes échangée avec les 8 voisins, O(N/√p) cellules par processus.
+    """
+    def __init__(self, comm, dim, init_pattern=None, engine='stencil'):
+        if engine == 'bitpacked':
+            raise ValueError("bitpacked : colonnes compactées, découpage en bandes seulement")
+        self.dimensions = dim
+        self.decomp = CartDecomposition(comm, dim)
+        self.dimensions_loc, self.start_loc = self.decomp.dimensions_loc, self.decomp.start_loc
+        self.cells = self.decomp.local_cells(init_pattern)
+        self.init_engine(engine, ghost_rows=True, ghost_columns=True)
+        self.glob_shape = dim
+
+    def gather(self, comm, grid_glob):
+        self.decomp.gather(self.cells, grid_glob)
+
+    def update_ghost_cells(self, comm):
+        self.decomp.update_ghost_cells(self.cells)
+
+
+class GrilleSerial(Generations):
     """
     Version série complète (1 seul processus, pas de ghost cells).
     Pour la comparaison de référence.
     """
-    def __init__(self, dim, init_pattern=None):
+    def __init__(self, dim, init_pattern=None, engine='stencil'):
         self.dimensions = dim
         if init_pattern is not None:
             self.cells = np.zeros(dim, dtype=np.uint8)
@@ -82,14 +153,7 @@ class GrilleSerial:
             self.cells[indices_i, indices_j] = 1
         else:
             self.cells = np.random.randint(2, size=dim, dtype=np.uint8)
-
-    def compute_next_iteration(self):
-        neighbours_count = sum(
-            np.roll(np.roll(self.cells, i, 0), j, 1)
-            for i in (-1, 0, 1) for j in (-1, 0, 1) if (i != 0 or j != 0)
-        )
-        next_cells = (neighbours_count == 3) | (self.cells & (neighbours_count == 2))
-        self.cells = next_cells
+        self.init_engine(engine)
 
 
 # Patterns disponibles
@@ -117,10 +181,10 @@ dico_patterns = {
 }
 
 
-def run_serial_benchmark(pattern_name, steps):
+def run_serial_benchmark(pattern_name, steps, engine='stencil'):
     """Benchmark série (référence)."""
     dim, pattern = dico_patterns[pattern_name]
-    grid = GrilleSerial(dim, pattern)
+    grid = GrilleSerial(dim, pattern, engine)
     # Warm-up
     for _ in range(10):
         grid.compute_next_iteration()
@@ -131,20 +195,27 @@ def run_serial_benchmark(pattern_name, steps):
     return t_end - t_start
 
 
-def run_parallel_benchmark(pattern_name, steps, comm):
-    """Benchmark parallèle (mode headless, tous les rangs calculent)."""
+def run_parallel_benchmark(pattern_name, steps, comm, tracer=None, engine='stencil',
+                           decomposition='rows'):
+    """
+    Benchmark parallèle (mode headless, tous les rangs calculent), grille découpée en
+    bandes de lignes ('rows') ou en blocs 2D ('cart').
+    Les phases de chaque itération sont ajoutées au traceur (mpi_trace) s'il est donné.
+    """
     rank = comm.Get_rank()
     size = comm.Get_size()
     dim, pattern = dico_patterns[pattern_name]
 
-    grid = GrilleHeadless(rank, size, dim, pattern)
+    if decomposition == 'cart':
+        grid = GrilleCart(comm, dim, pattern, engine)
+    else:
+        grid = GrilleHeadless(rank, size, dim, pattern, engine)
     grid.update_ghost_cells(comm)
 
-    # Préparer Gatherv
+    # Grille rassemblée sur le rang 0 (lignes éventuellement compactées)
     grid_glob = None
     if rank == 0:
-        grid_glob = np.zeros(dim, dtype=np.uint8)
-    sendcounts = np.array(comm.gather(grid.cells[1:-1, :].size, root=0))
+        grid_glob = np.zeros(grid.glob_shape, dtype=grid.cells.dtype)
 
     # Warm-up
     for _ in range(10):
@@ -156,28 +227,38 @@ def run_parallel_benchmark(pattern_name, steps, comm):
     t_calc_total = 0.0
     t_ghost_total = 0.0
     t_gather_total = 0.0
+    # Les temps déjà mesurés (MPI.Wtime) sont enregistrés tels quels dans la trace
+    if tracer is None:
+        tracer = Tracer(comm, enabled=False)
+    id_calc = tracer.name_id('compute')
+    id_ghost = tracer.name_id('exchange', 'cellules fantômes')
+    id_gather = tracer.name_id('collective', 'Gatherv')
 
     comm.Barrier()
-    t_start = time.time()
+    t_start = MPI.Wtime()
     for _ in range(steps):
-        tc1 = time.time()
+        tc1 = MPI.Wtime()
         grid.compute_next_iteration()
-        tc2 = time.time()
+        tc2 = MPI.Wtime()
         grid.update_ghost_cells(comm)
-        tc3 = time.time()
-        comm.Gatherv(grid.cells[1:-1, :], [grid_glob, sendcounts], root=0)
-        tc4 = time.time()
+        tc3 = MPI.Wtime()
+        grid.gather(comm, grid_glob)
+        tc4 = MPI.Wtime()
         t_calc_total += (tc2 - tc1)
         t_ghost_total += (tc3 - tc2)
         t_gather_total += (tc4 - tc3)
+        tracer.record(id_calc, tc1, tc2)
+        tracer.record(id_ghost, tc2, tc3)
+        tracer.record(id_gather, tc3, tc4)
     comm.Barrier()
-    t_end = time.time()
+    t_end = MPI.Wtime()
 
     t_total = t_end - t_start
     return t_calc_total, t_ghost_total, t_gather_total, t_total
 
 
-def run_all_benchmarks(pattern_name, steps, mpirun_path):
+def run_all_benchmarks(pattern_name, steps, mpirun_path, engine='stencil', random_size=None,
+                       torus_size=None, decomposition='rows'):
     """Lance automatiquement les benchmarks pour différents np."""
     script_path = os.path.abspath(__file__)
     results = []
@@ -194,8 +275,10 @@ def run_all_benchmarks(pattern_name, steps, mpirun_path):
         cmd = [
             mpirun_path, "--oversubscribe", "-np", str(np_val),
             sys.executable, script_path,
-            "--steps", str(steps), "--pattern", pattern_name
-        ]
+            "--steps", str(steps), "--pattern", pattern_name, "--engine", engine,
+            "--decomposition", decomposition
+        ] + (["--random", str(random_size)] if random_size else []) \
+          + (["--torus", str(torus_size)] if torus_size else [])
         try:
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
             print(result.stdout)
@@ -216,7 +299,7 @@ def run_all_benchmarks(pattern_name, steps, mpirun_path):
     csv_path = os.path.join(os.path.dirname(script_path), "benchmark_results.csv")
     with open(csv_path, 'w', newline='') as f:
         writer = csv.writer(f)
-        writer.writerow(["pattern", "grid_size", "steps", "nb_workers", "t_calc", "t_ghost", "t_gather", "t_total", "t_serial", "speedup", "efficiency"])
+        writer.writerow(["pattern", "grid_size", "steps", "nb_workers", "t_calc", "t_ghost", "t_gather", "t_total", "t_serial", "speedup", "efficiency", "engine", "decomposition"])
         for row in results:
             writer.writerow(row)
     print(f"\n\nResults saved to: {csv_path}")
@@ -228,7 +311,25 @@ if __name__ == '__main__':
     parser.add_argument('--steps', type=int, default=500, help='Number of iterations')
     parser.add_argument('--pattern', type=str, default='glider_gun', help='Pattern name')
     parser.add_argument('--run-all', action='store_true', help='Run all configurations automatically')
+    parser.add_argument('--engine', choices=ENGINES, default='stencil',
+                        help='Generation kernel: allocation-free stencil, np.roll course version, '
+                             'bit-packed grid or active tiles only')
+    parser.add_argument('--random', type=int, default=None, metavar='N',
+                        help='Random N x N grid instead of a pattern')
+    parser.add_argument('--torus', type=int, default=None, metavar='N',
+                        help='Place the pattern on an N x N torus')
+    parser.add_argument('--decomposition', choices=('rows', 'cart'), default='rows',
+                        help='Row strips, or 2-D blocks on a periodic Cartesian topology')
+    parser.add_argument('--trace', default=None, metavar='FILE',
+                        help='Per-rank Chrome trace (JSON, ui.perfetto.dev) of the parallel run')
     args = parser.parse_args()
+    if args.decomposition == 'cart' and args.engine == 'bitpacked':
+        parser.error("--engine bitpacked packs columns: use --decomposition rows")
+    if args.random is not None:
+        args.pattern = f"random_{args.random}"
+        dico_patterns[args.pattern] = ((args.random, args.random), None)
+    elif args.torus is not None:
+        dico_patterns[args.pattern] = ((args.torus, args.torus), dico_patterns[args.pattern][1])
 
     if args.run_all:
         # Find mpirun
@@ -244,7 +345,7 @@ if __name__ == '__main__':
         print("=" * 60)
         print(f"  Serial benchmark ({args.pattern}, {args.steps} steps)")
         print("=" * 60)
-        t_serial = run_serial_benchmark(args.pattern, args.steps)
+        t_serial = run_serial_benchmark(args.pattern, args.steps, args.engine)
         dim = dico_patterns[args.pattern][0]
         print(f"  Serial time: {t_serial:.4f}s ({t_serial/args.steps*1000:.2f} ms/iter)")
         print(f"  Grid: {dim[0]}×{dim[1]}")
@@ -254,7 +355,8 @@ if __name__ == '__main__':
         with open(serial_file, 'w') as f:
             f.write(f"{t_serial}")
 
-        run_all_benchmarks(args.pattern, args.steps, mpirun_path)
+        run_all_benchmarks(args.pattern, args.steps, mpirun_path, args.engine, args.random,
+                           args.torus, args.decomposition)
     else:
         # Single MPI run — all processes compute
         comm = MPI.COMM_WORLD
@@ -266,18 +368,19 @@ if __name__ == '__main__':
         # Run serial on rank 0 for comparison
         t_serial = 0
         if rank == 0:
-            t_serial = run_serial_benchmark(args.pattern, args.steps)
+            t_serial = run_serial_benchmark(args.pattern, args.steps, args.engine)
 
         # Run parallel
+        tracer = Tracer(comm, enabled=args.trace is not None)
         t_calc, t_ghost, t_gather, t_total = run_parallel_benchmark(
-            args.pattern, args.steps, comm)
+            args.pattern, args.steps, comm, tracer, args.engine, args.decomposition)
 
         if rank == 0:
             speedup = t_serial / t_total if t_total > 0 else 0
             efficiency = speedup / size * 100
 
             print(f"\n{'='*65}")
-            print(f"  Benchmark : {args.pattern} ({dim[0]}×{dim[1]}), {args.steps} itérations, {size} workers")
+            print(f"  Benchmark : {args.pattern} ({dim[0]}×{dim[1]}), {args.steps} itérations, {size} workers, moteur {args.engine}, découpage {args.decomposition}")
             print(f"{'='*65}")
             print(f"  {'Série (référence)':<30}: {t_serial:.4f}s ({t_serial/args.steps*1000:.2f} ms/iter)")
             print(f"  {'Parallèle (total)':<30}: {t_total:.4f}s ({t_total/args.steps*1000:.2f} ms/iter)")
@@ -291,4 +394,6 @@ if __name__ == '__main__':
             # CSV output for automated collection
             print(f"CSV:{args.pattern},{dim[0]}x{dim[1]},{args.steps},{size},"
                   f"{t_calc:.6f},{t_ghost:.6f},{t_gather:.6f},{t_total:.6f},"
-                  f"{t_serial:.6f},{speedup:.4f},{efficiency:.1f}")
+                  f"{t_serial:.6f},{speedup:.4f},{efficiency:.1f},{args.engine},{args.decomposition}")
+
+        tracer.save(args.trace, f"game_of_life {args.pattern} ({size} processus)")
@@ -24,6 +24,8 @@ On itère ensuite pour étudier la façon dont évolue la population des cellule
 import pygame  as pg
 import numpy   as np
 from mpi4py import MPI
+from life_engine import LifeStencil
+from life_cart import CartDecomposition
 
 globCom = MPI.COMM_WORLD.Dup()
 rank = globCom.Get_rank()
@@ -34,54 +36,47 @@ print(f"rang global : {rank}, rang local : {newCom.Get_rank()}, nb de processus
 
 class Grille:
     """
-    Grille torique décrivant l'automate cellulaire.
+    Grille torique décrivant l'automate cellulaire, répartie en blocs 2D sur les processus
+    d'une topologie cartésienne périodique (voir life_cart.py) ; chaque processus possède
+    un bloc entouré d'une couronne de cellules fantômes.
     En entrée lors de la création de la grille :
+        - decomp est le découpage (CartDecomposition) de la grille sur les processus de calcul
         - dimensions est un tuple contenant le nombre de cellules dans les deux directions (nombre lignes, nombre colonnes)
         - init_pattern est une liste de cellules initialement vivantes sur cette grille (les autres sont considérées comme mortes)
         - color_life est la couleur dans laquelle on affiche une cellule vivante
         - color_dead est la couleur dans laquelle on affiche une cellule morte
     Si aucun pattern n'est donné, on tire au hasard quels sont les cellules vivantes et les cellules mortes
     Exemple :
-       grid = Grille( (10,10), init_pattern=[(2,2),(0,2),(4,2),(2,0),(2,4)], color_life=pg.Color("red"), color_dead=pg.Color("black"))
+       grid = Grille( CartDecomposition(newCom, (10,10)), (10,10), init_pattern=[(2,2),(0,2),(4,2),(2,0),(2,4)], color_life=pg.Color("red"), color_dead=pg.Color("black"))
     """
-    def __init__(self, rank : int, nbp : int, dim, init_pattern=None, color_life=pg.Color("black"), color_dead=pg.Color("white")):
-        import random
+    def __init__(self, decomp, dim, init_pattern=None, color_life=pg.Color("black"), color_dead=pg.Color("white")):
+        self.decomp = decomp
         self.dimensions = dim
-        self.dimensions_loc = (dim[0]//nbp + (1 if rank < dim[0]%nbp else 0),dim[1])
-        self.start_loc = rank * self.dimensions_loc[0] + (dim[0]%nbp if rank >= dim[0]%nbp else 0)
-
-        if init_pattern is not None:
-            self.cells = np.zeros((self.dimensions_loc[0]+2,self.dimensions_loc[1]), dtype=np.uint8)
-            indices_i = [v[0]-self.start_loc+1 for v in init_pattern 
-                         if v[0] >= self.start_loc and v[0] < self.start_loc+self.dimensions_loc[0]]
-            indices_j = [v[1] for v in init_pattern]
-            if len(indices_i) > 0:
-                self.cells[indices_i,indices_j] = 1
-        else:
-            self.cells = np.random.randint(2, size=dim, dtype=np.uint8)
+        self.dimensions_loc = decomp.dimensions_loc
+        self.start_loc = decomp.start_loc
+        # Bloc local et couronne de cellules fantômes : (lignes + 2, colonnes + 2)
+        self.cells = decomp.local_cells(init_pattern)
+        # Double tampon : la génération suivante est écrite dans next_cells puis échangée
+        self.next_cells = np.empty_like(self.cells)
+        self.stencil = LifeStencil(self.cells.shape)
         self.col_life = color_life
         self.col_dead = color_dead
 
     def compute_next_iteration(self):
         """
-        Calcule la prochaine génération de cellules en suivant les règles du jeu de la vie
+        Calcule la prochaine génération de cellules en suivant les règles du jeu de la vie,
+        sans allocation (stencil sur tampons préalloués, voir life_engine.py).
+        Renvoie le masque des cellules modifiées (tampon réutilisé à chaque génération)
         """
-        neighbours_count = sum(np.roll(np.roll(self.cells, i, 0), j, 1) for i in (-1, 0, 1) for j in (-1, 0, 1) if (i != 0 or j != 0))  
-        next_cells = (neighbours_count == 3) | (self.cells & (neighbours_count == 2))
-        diff_cells = (next_cells != self.cells)
-        self.cells = next_cells
+        diff_cells = self.stencil.step(self.cells, self.next_cells)
+        self.cells, self.next_cells = self.next_cells, self.cells
         return diff_cells
 
     def update_ghost_cells(self):
         """
-        Met à jour les cellules fantômes
+        Met à jour les cellules fantômes (8 voisins, coins compris)
         """
-        req1 = newCom.Irecv(self.cells[-1,:], source = (newCom.rank+1)%newCom.size, tag=101)
-        req2 = newCom.Irecv(self.cells[0,:], source = (newCom.rank+newCom.size-1)%newCom.size, tag=102)
-        newCom.Send(self.cells[-2,:], dest = (newCom.rank+1)%newCom.size, tag=102)
-        newCom.Send(self.cells[1,:], dest = (newCom.rank+newCom.size-1)%newCom.size, tag=101)
-        req1.Wait()
-        req2.Wait()
+        self.decomp.update_ghost_cells(self.cells)
 
 class App:
     """
@@ -108,7 +103,7 @@ class App:
         self.colors = np.array([self.grid.col_dead[:-1], self.grid.col_life[:-1]])
 
     def draw(self):
-        surface = pg.surfarray.make_surface(self.colors[self.grid.cells[1:-1,:].T])
+        surface = pg.surfarray.make_surface(self.colors[self.grid.cells[1:-1,1:-1].T])
         surface = pg.transform.flip(surface, False, True)
         surface = pg.transform.scale(surface, (self.width, self.height))
         self.screen.blit(surface, (0,0))
@@ -153,14 +148,18 @@ if __name__ == '__main__':
     except KeyError:
         print("No such pattern. Available ones are:", dico_patterns.keys())
         exit(1)
+    # Messages de contrôle de l'affichage vers le calcul : 1 = envoyer la grille, -1 = arrêt
+    ctrl = np.empty(1, dtype=np.int32)
     if rank == 0:
         pg.init()
-        grid = Grille(0, 1, *init_pattern)
+        # Grille complète sur le seul processus d'affichage
+        grid = Grille(CartDecomposition(MPI.COMM_SELF, init_pattern[0]), *init_pattern)
         appli = App((resx, resy), grid)
         loop = True
         while loop:
-            globCom.send(1, dest=1)
-            appli.grid.cells[1:-1,:] = globCom.recv(source=1)
+            globCom.Send(np.array([1], dtype=np.int32), dest=1)
+            # Réception directe (type dérivé) dans le bloc intérieur de la grille affichée
+            globCom.Recv(grid.decomp.interior(appli.grid.cells), source=1)
             t2 = time.time()
             appli.draw()
             t3 = time.time()
@@ -168,17 +167,16 @@ if __name__ == '__main__':
                 if event.type == pg.QUIT:
                     loop = False
                     pg.quit()
-                    globCom.send(-1,dest=1)
+                    globCom.Send(np.array([-1], dtype=np.int32), dest=1)
             print(f"Temps affichage : {t3-t2:2.2e} secondes", flush=True)
     else:
-        grid = Grille(newCom.rank, newCom.size, *init_pattern)
+        grid = Grille(CartDecomposition(newCom, init_pattern[0]), *init_pattern)
         grid.update_ghost_cells()
         print(f"rank loc : {newCom.rank}, cells locales : \n{grid.cells.T}")
 
         grid_glob = None
         if newCom.rank == 0:
             grid_glob = np.zeros(init_pattern[0], dtype=np.uint8)
-        sendcounts = np.array(newCom.gather(grid.cells[1:-1,:].size, root=0))
 
         loop = True
         while loop:
@@ -187,13 +185,13 @@ if __name__ == '__main__':
             diff = grid.compute_next_iteration()
             grid.update_ghost_cells()
             t2 = time.time()
-            newCom.Gatherv(grid.cells[1:-1,:], [grid_glob, sendcounts], root=0)
+            grid.decomp.gather(grid.cells, grid_glob)
             if newCom.rank == 0:
                 if (globCom.Iprobe(source=0)):
-                    a = globCom.recv(source=0)
-                    if a==-1:
+                    globCom.Recv(ctrl, source=0)
+                    if ctrl[0]==-1:
                         loop = False
                     else:
-                        globCom.send(grid_glob, dest=0)
+                        globCom.Send(grid_glob, dest=0)
             print(f"Temps calcul prochaine generation : {t2-t1:2.2e} secondes", flush=True)
 
@@ -0,0 +1,217 @@
+"""
+HashLife : le jeu de la vie sur un tore, par sauts de 2^k générations
+
+La grille est un arbre quaternaire canonique : chaque nœud de niveau k (carré de 2^k
+cellules de côté) est construit par join() à partir de ses quatre quarts, et deux carrés
+identiques sont le même objet (cache LRU de join). successor() calcule le centre d'un
+nœud (niveau k-1) 2^j générations plus tard (j <= k-2) et mémorise son résultat (cache
+LRU, clé : nœud et j) : une région déjà rencontrée n'est jamais recalculée.
+
+Le tore (lignes, colonnes) est traité comme le plan infini qu'il pave : le nœud couvrant
+la fenêtre [0, 2^m)² du pavage a au plus (lignes/pgcd(lignes, 2^l)) x (colonnes/pgcd(colonnes, 2^l))
+sous-nœuds différents par niveau l, donc le saut de 2^30 générations d'une grille de
+400x400 ne manipule que quelques milliers de nœuds par niveau. Le centre du résultat,
+replié sur le tore, est la grille 2^k générations plus tard.
+
+Usage :
+    python3 hashlife.py block_switch_engine --jump 30
+    python3 hashlife.py flat --jump 20 --steps 8
+    python3 hashlife.py glider_gun --jump 10 --check
+"""
+import numpy as np
+import argparse
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+# Nombre maximal de nœuds canoniques et de résultats mémorisés (caches LRU) : un nœud
+# évincé est simplement reconstruit (égalité structurelle), sans erreur
+HASHLIFE_CACHE = 1 << 22
+
+# k : niveau (côté 2^k), a, b, c, d : quarts nord-ouest, nord-est, sud-ouest, sud-est,
+# n : nombre de cellules vivantes, hash : empreinte calculée une fois à la construction
+Node = namedtuple('Node', ['k', 'a', 'b', 'c', 'd', 'n', 'hash'])
+Node.__hash__ = lambda self: self.hash
+Node.__repr__ = lambda self: f"Node(k={self.k}, n={self.n})"
+
+OFF = Node(0, None, None, None, None, 0, 0)
+ON = Node(0, None, None, None, None, 1, 1)
+
+
+@lru_cache(maxsize=HASHLIFE_CACHE)
+def join(a: Node, b: Node, c: Node, d: Node) -> Node:
+    """Nœud canonique de quarts a (nord-ouest), b (nord-est), c (sud-ouest), d (sud-est)"""
+    return Node(a.k + 1, a, b, c, d, a.n + b.n + c.n + d.n,
+                hash((a.k + 1, a.hash, b.hash, c.hash, d.hash)))
+
+
+@lru_cache(maxsize=None)
+def get_zero(k: int) -> Node:
+    """Carré vide de niveau k"""
+    return OFF if k == 0 else join(*(get_zero(k - 1),)*4)
+
+
+def _life_4x4(m: Node) -> Node:
+    """Centre 2x2 d'un nœud 4x4 à la génération suivante"""
+    cells = [[m.a.a, m.a.b, m.b.a, m.b.b],
+             [m.a.c, m.a.d, m.b.c, m.b.d],
+             [m.c.a, m.c.b, m.d.a, m.d.b],
+             [m.c.c, m.c.d, m.d.c, m.d.d]]
+    centre = []
+    for i in (1, 2):
+        for j in (1, 2):
+            count = sum(cells[y][x].n for y in (i - 1, i, i + 1)
+                        for x in (j - 1, j, j + 1)) - cells[i][j].n
+            centre.append(ON if count == 3 or (count == 2 and cells[i][j].n) else OFF)
+    return join(*centre)
+
+
+@lru_cache(maxsize=HASHLIFE_CACHE)
+def successor(m: Node, j: int) -> Node:
+    """Centre de m (niveau k-1) 2^j générations plus tard, j <= k-2"""
+    if m.n == 0:
+        return m.a
+    if m.k == 2:
+        return _life_4x4(m)
+    j = min(j, m.k - 2)
+    # Neuf carrés de niveau k-1 qui se recouvrent, avancés de 2^j générations
+    # (2^(k-3) si j = k-2 : l'autre moitié du saut est faite ensuite)
+    jj = min(j, m.k - 3)
+    c1 = successor(m.a, jj)
+    c2 = successor(join(m.a.b, m.b.a, m.a.d, m.b.c), jj)
+    c3 = successor(m.b, jj)
+    c4 = successor(join(m.a.c, m.a.d, m.c.a, m.c.b), jj)
+    c5 = successor(join(m.a.d, m.b.c, m.c.b, m.d.a), jj)
+    c6 = successor(join(m.b.c, m.b.d, m.d.a, m.d.b), jj)
+    c7 = successor(m.c, jj)
+    c8 = successor(join(m.c.b, m.d.a, m.c.d, m.d.c), jj)
+    c9 = successor(m.d, jj)
+    if j < m.k - 2:
+        # Saut court : centres des quatre carrés, sans calcul supplémentaire
+        return join(join(c1.d, c2.c, c4.b, c5.a), join(c2.d, c3.c, c5.b, c6.a),
+                    join(c4.d, c5.c, c7.b, c8.a), join(c5.d, c6.c, c8.b, c9.a))
+    return join(successor(join(c1, c2, c4, c5), jj), successor(join(c2, c3, c5, c6), jj),
+                successor(join(c4, c5, c7, c8), jj), successor(join(c5, c6, c8, c9), jj))
+
+
+def cache_info() -> dict:
+    """Occupation des caches LRU (nœuds canoniques, résultats mémorisés)"""
+    return {'nodes': join.cache_info().currsize, 'results': successor.cache_info().currsize}
+
+
+class HashLife:
+    """
+    Grille torique cells (lignes, colonnes) de 0/1 avancée par sauts de 2^k générations.
+        hl = HashLife.from_pattern(*dico_patterns['flat'])
+        hl.jump(30)
+        grid.cells[1:-1, 1:-1] = hl.cells     # ou hl.export(grid.cells[1:-1, 1:-1])
+    """
+    def __init__(self, cells: np.ndarray):
+        self.cells = np.ascontiguousarray(cells, dtype=np.uint8)
+        self.generation = 0
+
+    @classmethod
+    def from_pattern(cls, dim, init_pattern=None):
+        """Grille d'une entrée de dico_patterns (grille aléatoire sans pattern, comme Grille)"""
+        if init_pattern is None:
+            return cls(np.random.randint(2, size=dim, dtype=np.uint8))
+        cells = np.zeros(dim, dtype=np.uint8)
+        cells[[v[0] for v in init_pattern], [v[1] for v in init_pattern]] = 1
+        return cls(cells)
+
+    def _tiling(self, m: int) -> Node:
+        """Nœud de niveau m couvrant la fenêtre [0, 2^m)² du pavage du plan par le tore"""
+        rows, columns = self.cells.shape
+        leaves = [[ON if v else OFF for v in row] for row in self.cells.tolist()]
+        nodes = {}
+
+        def build(k, y, x):
+            if k == 0:
+                return leaves[y][x]
+            key = (k, y, x)
+            node = nodes.get(key)
+            if node is None:
+                h = 1 << (k - 1)
+                node = nodes[key] = join(build(k - 1, y, x), build(k - 1, y, (x + h) % columns),
+                                         build(k - 1, (y + h) % rows, x),
+                                         build(k - 1, (y + h) % rows, (x + h) % columns))
+            return node
+        return build(m, 0, 0)
+
+    @staticmethod
+    def _fill(node: Node, out: np.ndarray, y: int, x: int) -> None:
+        """Écrit dans out les cellules vivantes de node placé en (y, x) (hors de out : ignorées)"""
+        if node.n == 0 or y >= out.shape[0] or x >= out.shape[1]:
+            return
+        if node.k == 0:
+            out[y, x] = 1
+            return
+        h = 1 << (node.k - 1)
+        HashLife._fill(node.a, out, y, x)
+        HashLife._fill(node.b, out, y, x + h)
+        HashLife._fill(node.c, out, y + h, x)
+        HashLife._fill(node.d, out, y + h, x + h)
+
+    def jump(self, k: int) -> None:
+        """Avance la grille de 2^k générations"""
+        rows, columns = self.cells.shape
+        # Fenêtre de niveau m : saut de 2^k possible (k <= m-2), et centre du résultat
+        # (côté 2^(m-1)) couvrant le tore
+        m = max(k + 2, (max(rows, columns) - 1).bit_length() + 1, 2)
+        result = successor(self._tiling(m), k)
+        # Le résultat couvre [s, s + 2^(m-1))² avec s = 2^(m-2) : cellule (s+i, s+j) du plan
+        # = cellule ((s+i) % lignes, (s+j) % colonnes) du tore
+        window = np.zeros((rows, columns), dtype=np.uint8)
+        self._fill(result, window, 0, 0)
+        s = 1 << (m - 2)
+        self.cells = np.roll(window, (s % rows, s % columns), axis=(0, 1))
+        self.generation += 1 << k
+
+    def advance(self, generations: int) -> None:
+        """Avance la grille d'un nombre quelconque de générations (un saut par bit à 1)"""
+        for k in range(generations.bit_length()):
+            if generations >> k & 1:
+                self.jump(k)
+
+    @property
+    def population(self) -> int:
+        return int(self.cells.sum())
+
+    def export(self, out: np.ndarray) -> None:
+        """Copie la grille dans out (par exemple le bloc intérieur de Grille.cells)"""
+        out[...] = self.cells
+
+
+if __name__ == '__main__':
+    from benchmark_headless import dico_patterns
+    from life_engine import LifeStencil
+
+    parser = argparse.ArgumentParser(description="Jeu de la vie sur un tore par HashLife")
+    parser.add_argument('pattern', choices=list(dico_patterns), help="Pattern de dico_patterns")
+    parser.add_argument('--jump', type=int, default=20, help="Sauts de 2^JUMP générations")
+    parser.add_argument('--steps', type=int, default=1, help="Nombre de sauts")
+    parser.add_argument('--torus', type=int, default=None, metavar='N',
+                        help="Pattern placé sur un tore de N x N")
+    parser.add_argument('--check', action='store_true',
+                        help="Compare chaque saut au calcul génération par génération (LifeStencil)")
+    args = parser.parse_args()
+
+    dim, pattern = dico_patterns[args.pattern]
+    if args.torus is not None:
+        dim = (args.torus, args.torus)
+    hl = HashLife.from_pattern(dim, pattern)
+    print(f"{args.pattern} ({dim[0]}×{dim[1]}), sauts de 2^{args.jump} générations")
+    for _ in range(args.steps):
+        before = hl.cells
+        t1 = time.time()
+        hl.jump(args.jump)
+        t2 = time.time()
+        info = cache_info()
+        print(f"  génération {hl.generation:>16} : {hl.population:>7} cellules vivantes, "
+              f"{t2 - t1:.3f}s ({info['nodes']} nœuds, {info['results']} résultats)")
+        if args.check:
+            stencil, cells, out = LifeStencil(dim), before.copy(), np.empty_like(before)
+            for _ in range(1 << args.jump):
+                stencil.step(cells, out)
+                cells, out = out, cells
+            print(f"    vérification LifeStencil : {'identique' if (cells == hl.cells).all() else 'DIFFÉRENT'}")
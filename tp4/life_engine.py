@@ -0,0 +1,292 @@
+"""
+Moteur de calcul du jeu de la vie
+
+    roll_step   : version du cours (8 copies décalées par np.roll, 16 tableaux
+                  temporaires par génération), gardée comme référence
+    LifeStencil : une génération sur un tableau torique (lignes, colonnes) de uint8,
+                  sans allocation : le nombre de voisines est une somme séparable
+                  (3 cellules sur la ligne, puis 3 lignes), calculée par des vues
+                  décalées dans des tampons alloués une fois pour toutes
+    BitLife     : même calcul sur une grille compactée, 64 cellules par mot uint64
+                  (pack_cells / unpack_cells), évaluée mot par mot par des additionneurs
+                  logiques (un bit par cellule, 64 cellules par opération)
+    ActiveLife  : même calcul que LifeStencil, limité aux tuiles actives : la grille est
+                  découpée en tuiles, seules les tuiles modifiées à la génération
+                  précédente et leurs 8 voisines sont recalculées
+
+Les lignes et les colonnes sont repliées comme avec np.roll : sur une grille locale
+entourée de lignes fantômes, les lignes intérieures ne dépendent que des lignes
+voisines (les lignes fantômes sont écrasées par l'échange suivant).
+"""
+import numpy as np
+
+# Moteurs disponibles pour les grilles du benchmark
+ENGINES = ('roll', 'stencil', 'bitpacked', 'active')
+# Cellules par mot des grilles compactées
+WORD_BITS = 64
+# Taille visée (octets) de chacun des 9 tampons de BitLife : la grille est traitée par
+# bandes de lignes dont les tampons restent en cache (bandes trop petites : coût des
+# appels numpy ; trop grandes : accès mémoire)
+BITLIFE_BAND_BYTES = 1 << 17
+_ONE = np.uint64(1)
+# Côté des tuiles d'ActiveLife, nombre de tuiles calculées ensemble (taille des
+# tableaux temporaires) et part de tuiles actives au-delà de laquelle toute la grille
+# est recalculée par LifeStencil
+ACTIVE_TILE = 32
+ACTIVE_BATCH = 256
+ACTIVE_DENSE = 0.5
+
+
+def roll_step(cells: np.ndarray):
+    """Génération suivante et masque des cellules modifiées (version du cours)"""
+    neighbours_count = sum(np.roll(np.roll(cells, i, 0), j, 1)
+                           for i in (-1, 0, 1) for j in (-1, 0, 1) if (i != 0 or j != 0))
+    next_cells = (neighbours_count == 3) | (cells & (neighbours_count == 2))
+    return next_cells, next_cells != cells
+
+
+class LifeStencil:
+    """Tampons de travail d'une grille de forme shape"""
+    def __init__(self, shape):
+        # Somme horizontale (j-1, j, j+1) puis nombre de voisines de chaque cellule
+        self.row_sums = np.empty(shape, dtype=np.uint8)
+        self.neighbours = np.empty(shape, dtype=np.uint8)
+        self.diff = np.empty(shape, dtype=bool)
+
+    def step(self, cells: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Écrit dans out la génération suivant cells (deux tableaux distincts de la forme
+        du stencil) ; renvoie le masque des cellules modifiées (tampon réutilisé)
+        """
+        h, n = self.row_sums, self.neighbours
+        # Somme horizontale, colonnes repliées
+        np.add(cells[:, :-2], cells[:, 1:-1], out=h[:, 1:-1])
+        np.add(h[:, 1:-1], cells[:, 2:], out=h[:, 1:-1])
+        np.add(cells[:, -1], cells[:, 0], out=h[:, 0])
+        np.add(h[:, 0], cells[:, 1], out=h[:, 0])
+        np.add(cells[:, -2], cells[:, -1], out=h[:, -1])
+        np.add(h[:, -1], cells[:, 0], out=h[:, -1])
+        # Somme verticale des sommes horizontales, lignes repliées
+        np.add(h[:-2], h[1:-1], out=n[1:-1])
+        np.add(n[1:-1], h[2:], out=n[1:-1])
+        np.add(h[-1], h[0], out=n[0])
+        np.add(n[0], h[1], out=n[0])
+        np.add(h[-2], h[-1], out=n[-1])
+        np.add(n[-1], h[0], out=n[-1])
+        # Voisines seules (la somme 3x3 contient la cellule)
+        np.subtract(n, cells, out=n)
+        # Vivante au tour suivant : 3 voisines, ou 2 voisines et vivante,
+        # c'est-à-dire (voisines | cellule) == 3
+        np.bitwise_or(n, cells, out=n)
+        np.equal(n, 3, out=out)
+        np.not_equal(out, cells, out=self.diff)
+        return self.diff
+
+
+def pack_cells(cells: np.ndarray) -> np.ndarray:
+    """
+    Grille (lignes, colonnes) de 0/1 compactée en (lignes, mots) uint64 : la cellule j
+    est le bit j % 64 du mot j // 64 (np.packbits(..., bitorder='little') lu en mots
+    petit-boutistes), les bits au-delà de la dernière colonne sont nuls
+    """
+    rows, columns = cells.shape
+    words = -(-columns // WORD_BITS)
+    packed = np.zeros((rows, words*8), dtype=np.uint8)
+    packed[:, :-(-columns // 8)] = np.packbits(cells, axis=1, bitorder='little')
+    return packed.view('<u8').astype(np.uint64)
+
+
+def unpack_cells(words: np.ndarray, columns: int) -> np.ndarray:
+    """Inverse de pack_cells : grille (lignes, colonnes) de uint8"""
+    return np.unpackbits(words.astype('<u8').view(np.uint8), axis=1, count=columns,
+                         bitorder='little')
+
+
+class BitLife:
+    """
+    Tampons de travail d'une grille compactée de shape = (lignes, colonnes) cellules.
+    Pour chaque mot, les voisines ouest/est sont le mot décalé d'un bit (avec le bit
+    du mot voisin, colonnes repliées) ; le nombre de voisines est additionné en
+    parallèle sur les 64 bits : somme sur la ligne (additionneur complet, sans la
+    cellule pour la ligne centrale), puis somme des trois lignes, dont on ne garde
+    que le bit de poids 1 et le test « bits de poids 2 et 4 valent 1 » (2 ou 3 voisines).
+    La grille est traitée par bandes de band_rows lignes (copiées avec leurs deux lignes
+    voisines), pour que les tampons de travail restent en cache.
+    """
+    def __init__(self, shape, band_rows: int = None):
+        rows, self.columns = shape
+        words = -(-self.columns // WORD_BITS)
+        if band_rows is None:
+            band_rows = max(1, BITLIFE_BAND_BYTES // (8*words))
+        self.band_rows = min(band_rows, rows)
+        self.shape = (self.band_rows + 2, words)
+        # Position du bit de la dernière colonne dans le dernier mot, bits utiles de ce mot
+        self.last_bit = np.uint64((self.columns - 1) % WORD_BITS)
+        self.last_mask = np.uint64((1 << ((self.columns - 1) % WORD_BITS + 1)) - 1)
+        (self.band, self.mid0, self.row0, self.mid1, self.row1,
+         self.t0, self.t1, self.t2, self.t3) = (np.empty(self.shape, dtype=np.uint64)
+                                                for _ in range(9))
+
+    def _shifted(self, cells, west, east, tmp):
+        """Voisines ouest et est de chaque cellule"""
+        np.left_shift(cells, _ONE, out=west)
+        np.right_shift(cells[:, :-1], np.uint64(WORD_BITS - 1), out=tmp[:, 1:])
+        np.bitwise_or(west[:, 1:], tmp[:, 1:], out=west[:, 1:])
+        # Colonne 0 : voisine ouest = dernière colonne
+        np.right_shift(cells[:, -1], self.last_bit, out=tmp[:, 0])
+        np.bitwise_and(tmp[:, 0], _ONE, out=tmp[:, 0])
+        np.bitwise_or(west[:, 0], tmp[:, 0], out=west[:, 0])
+
+        np.right_shift(cells, _ONE, out=east)
+        np.left_shift(cells[:, 1:], np.uint64(WORD_BITS - 1), out=tmp[:, :-1])
+        np.bitwise_or(east[:, :-1], tmp[:, :-1], out=east[:, :-1])
+        # Dernière colonne : voisine est = colonne 0
+        np.bitwise_and(cells[:, 0], _ONE, out=tmp[:, 0])
+        np.left_shift(tmp[:, 0], self.last_bit, out=tmp[:, 0])
+        np.bitwise_or(east[:, -1], tmp[:, 0], out=east[:, -1])
+
+    def _vertical(self, out, cells, up0, up1, mid0, mid1, down0, down1, t0, t1, t2, t3):
+        """Règle du jeu sur des lignes, à partir des sommes (bit 0, bit 1) des lignes voisines"""
+        # Bit de poids 1 de la somme (t0) et retenue (t1)
+        np.bitwise_xor(up0, down0, out=t0)
+        np.bitwise_and(up0, down0, out=t1)
+        np.bitwise_and(mid0, t0, out=t2)
+        np.bitwise_or(t1, t2, out=t1)
+        np.bitwise_xor(t0, mid0, out=t0)
+        # Un seul bit à 1 parmi up1, mid1, down1 et la retenue : 2 ou 3 voisines
+        np.bitwise_xor(up1, mid1, out=t2)
+        np.bitwise_xor(down1, t1, out=t3)
+        np.bitwise_xor(t2, t3, out=t2)
+        np.bitwise_and(down1, t1, out=t1)
+        np.bitwise_and(up1, mid1, out=t3)
+        np.bitwise_or(t3, t1, out=t3)
+        np.invert(t3, out=t3)
+        np.bitwise_and(t2, t3, out=t2)
+        # Vivante : 3 voisines, ou 2 voisines et vivante
+        np.bitwise_or(t0, cells, out=t0)
+        np.bitwise_and(t2, t0, out=out)
+
+    def step(self, cells: np.ndarray, out: np.ndarray) -> None:
+        """Écrit dans out (mots uint64) la génération suivant cells, lignes repliées"""
+        rows = cells.shape[0]
+        for y0 in range(0, rows, self.band_rows):
+            y1 = min(y0 + self.band_rows, rows)
+            # Bande et ses lignes voisines (repliées aux bords de la grille)
+            n = y1 - y0 + 2
+            band = self.band[:n]
+            band[1:-1] = cells[y0:y1]
+            band[0] = cells[y0 - 1]
+            band[-1] = cells[y1 % rows]
+            self._band_step(band, out[y0:y1])
+        # Bits au-delà de la dernière colonne
+        np.bitwise_and(out[:, -1], self.last_mask, out=out[:, -1])
+
+    def _band_step(self, band, out):
+        """Génération suivante des lignes intérieures de band (lignes 1 à -2)"""
+        n = band.shape[0]
+        m0, m1, r0, r1 = self.mid0[:n], self.mid1[:n], self.row0[:n], self.row1[:n]
+        self._shifted(band, m0, r0, self.t0[:n])
+        # Ligne centrale, sans la cellule : demi-additionneur ouest + est
+        np.bitwise_and(m0, r0, out=m1)
+        np.bitwise_xor(m0, r0, out=m0)
+        # Lignes voisines, avec la cellule : additionneur complet
+        np.bitwise_and(band, m0, out=r1)
+        np.bitwise_or(r1, m1, out=r1)
+        np.bitwise_xor(band, m0, out=r0)
+        self._vertical(out, band[1:-1], r0[:-2], r1[:-2], m0[1:-1], m1[1:-1],
+                       r0[2:], r1[2:], *(b[1:n-1] for b in (self.t0, self.t1, self.t2, self.t3)))
+
+
+class ActiveLife:
+    """
+    Génération suivante limitée aux tuiles actives d'une grille de forme shape.
+
+    Une cellule dont les 9 cellules du voisinage n'ont pas changé à la génération
+    précédente garde son état. Une tuile est donc active si elle ou l'une de ses 8
+    voisines (repliées) a changé ; les autres valent déjà dans out (génération
+    précédente du double tampon) leur état dans cells et ne sont ni calculées ni copiées.
+    Les tuiles actives sont extraites avec leur bord d'une cellule (indices repliés),
+    calculées par paquets de ACTIVE_BATCH, puis réécrites dans out. Les tuiles de la
+    dernière ligne ou colonne incomplète débordent sur les premières : les cellules
+    repliées sont recalculées, avec la même valeur.
+
+    Avec ghost_rows (ghost_columns), les lignes (colonnes) 0 et -1 sont écrites par
+    l'échange entre processus : les tuiles qui les touchent sont activées quand elles
+    diffèrent de celles de la génération précédente.
+    """
+    def __init__(self, shape, tile: int = ACTIVE_TILE, ghost_rows: bool = False,
+                 ghost_columns: bool = False):
+        rows, columns = shape
+        self.tile = tile
+        self.tiles_shape = (-(-rows // tile), -(-columns // tile))
+        # Indices (repliés) des lignes et colonnes de chaque tuile, sans puis avec le bord
+        row_starts = np.arange(self.tiles_shape[0])*tile
+        col_starts = np.arange(self.tiles_shape[1])*tile
+        self.rows_in = (row_starts[:, None] + np.arange(tile)) % rows
+        self.cols_in = (col_starts[:, None] + np.arange(tile)) % columns
+        self.rows_out = (row_starts[:, None] + np.arange(-1, tile + 1)) % rows
+        self.cols_out = (col_starts[:, None] + np.arange(-1, tile + 1)) % columns
+        self.row_starts, self.col_starts = row_starts, col_starts
+        # Tuiles modifiées à la génération précédente (toutes au départ)
+        self.changed = np.ones(self.tiles_shape, dtype=bool)
+        self.ghost_rows = np.empty((2, columns), dtype=np.uint8) if ghost_rows else None
+        self.ghost_columns = np.empty((2, rows), dtype=np.uint8) if ghost_columns else None
+        self.stencil = None
+        self.nb_active = 0
+
+    def _tiles_any(self, mask):
+        """Tuiles contenant au moins une cellule de mask"""
+        tile, rows = self.tile, mask.shape[0]
+        full = rows - rows % tile
+        # Lignes de tuiles par un reshape (rapide), puis colonnes sur le tableau réduit
+        bands = mask[:full].reshape(-1, tile, mask.shape[1]).any(axis=1)
+        if full < rows:
+            bands = np.vstack((bands, mask[full:].any(axis=0)))
+        return np.logical_or.reduceat(bands, self.col_starts, axis=1)
+
+    def _active(self, cells):
+        """Tuiles à recalculer : tuiles modifiées et leurs voisines"""
+        changed = self.changed
+        if self.ghost_rows is not None:
+            # Lignes fantômes reçues depuis la génération précédente
+            for i, row in ((0, 0), (1, -1)):
+                moved = self.ghost_rows[i] != cells[row]
+                if moved.any():
+                    changed[row, np.logical_or.reduceat(moved, self.col_starts)] = True
+            self.ghost_rows[0], self.ghost_rows[1] = cells[0], cells[-1]
+        if self.ghost_columns is not None:
+            for i, column in ((0, 0), (1, -1)):
+                moved = self.ghost_columns[i] != cells[:, column]
+                if moved.any():
+                    changed[np.logical_or.reduceat(moved, self.row_starts), column] = True
+            self.ghost_columns[0], self.ghost_columns[1] = cells[:, 0], cells[:, -1]
+        active = changed | np.roll(changed, 1, 0) | np.roll(changed, -1, 0)
+        return active | np.roll(active, 1, 1) | np.roll(active, -1, 1)
+
+    def step(self, cells: np.ndarray, out: np.ndarray) -> None:
+        """
+        Écrit dans out la génération suivant cells ; out doit contenir la génération
+        précédente (double tampon) sauf au premier appel, où toutes les tuiles sont actives
+        """
+        active = self._active(cells)
+        tiles_y, tiles_x = np.nonzero(active)
+        self.nb_active = len(tiles_y)
+        if self.nb_active > ACTIVE_DENSE*active.size:
+            # Grille presque entièrement active : calcul complet
+            if self.stencil is None:
+                self.stencil = LifeStencil(cells.shape)
+            self.changed = self._tiles_any(self.stencil.step(cells, out))
+            return
+        changed = np.zeros(self.tiles_shape, dtype=bool)
+        for k in range(0, self.nb_active, ACTIVE_BATCH):
+            ty, tx = tiles_y[k:k + ACTIVE_BATCH], tiles_x[k:k + ACTIVE_BATCH]
+            # Tuiles et leur bord : (paquet, tile + 2, tile + 2)
+            block = cells[self.rows_out[ty][:, :, None], self.cols_out[tx][:, None, :]]
+            centre = block[:, 1:-1, 1:-1]
+            # Somme 3x3 séparable, sans la cellule
+            h = block[:, :, :-2] + block[:, :, 1:-1] + block[:, :, 2:]
+            n = h[:, :-2] + h[:, 1:-1] + h[:, 2:] - centre
+            new = (n | centre) == 3
+            out[self.rows_in[ty][:, :, None], self.cols_in[tx][:, None, :]] = new
+            changed[ty, tx] = (new != centre).any(axis=(1, 2))
+        self.changed = changed
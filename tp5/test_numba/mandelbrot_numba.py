@@ -1,45 +1,88 @@
 import pylab as plt
 import numpy as np
+import argparse
 import time
 import numba
 
-@numba.njit(parallel=True)
-def mandelbrot_iter(c_arr : np.ndarray, loop : numba.int64) -> np.ndarray:
-    n : numba.int64 = 0
-    color = np.ones(np.shape(c_arr), np.int64) + 5
-    for i in numba.prange(c_arr.shape[0]):
-        for j in range(c_arr.shape[1]):
-            c0 : numba.complex128 = c_arr[i,j]
-            z : numba.complex128 = 0.j
+# Tolérance de la détection de cycle selon la précision : en float32 l'orbite n'est
+# connue qu'à ~1e-7 près, une tolérance de 1e-10 ne détecterait presque rien
+CYCLE_TOLERANCE = {'float64': 1e-10, 'float32': 1e-5}
+
+@numba.njit(parallel=True, cache=True)
+def mandelbrot_iter(x : np.ndarray, y : np.ndarray, loop : numba.int64, tol2, escape2):
+    # Le point c = x[i] + 1j*y[j] est reconstruit à partir des deux axes de la grille :
+    # aucun tableau complexe de la taille de l'image n'est alloué, seule l'image `color`.
+    # Le calcul se fait en parties réelle et imaginaire dans le type de x, y, tol2 et
+    # escape2 (float64, ou float32 pour un aperçu rapide) ; on teste |z|² > 4 sans racine.
+    # Détection de cycle (Brent) : z est comparé à un point de référence de l'orbite
+    # mis à jour aux itérations 1, 2, 4, 8, ... ; si |z - z_ref|² < tol2, le point
+    # est dans l'ensemble et on sort sans attendre les `loop` itérations
+    nb_periodic : numba.int64 = 0
+    # Les points de l'ensemble gardent la valeur loop + 5, comme dans mandelbrot.py
+    color = np.empty((x.size, y.size), np.int32)
+    for i in numba.prange(x.size):
+        cr = x[i]
+        for j in range(y.size):
+            ci = y[j]
+            zr = cr - cr
+            zi = zr
+            zr2 = zr
+            zi2 = zr
+            zr_ref = zr
+            zi_ref = zr
+            period = 1
+            lam = 0
+            color[i,j] = loop + 5
             for n in range(loop):
-                z = z*z + c0
-                if np.abs(z)>2:
-                    color[i,j] = (100*np.minimum(color[i,j], n))/loop
+                zrzi = zr*zi
+                zr = zr2 - zi2 + cr
+                zi = zrzi + zrzi + ci
+                zr2 = zr*zr
+                zi2 = zi*zi
+                if zr2 + zi2 > escape2:
+                    color[i,j] = (100*n)//loop
+                    break
+                dr = zr - zr_ref
+                di = zi - zi_ref
+                if dr*dr + di*di < tol2:
+                    nb_periodic += 1
                     break
-    return color
+                lam += 1
+                if lam == period:
+                    zr_ref = zr
+                    zi_ref = zi
+                    period *= 2
+                    lam = 0
+    return color, nb_periodic
+
+parser = argparse.ArgumentParser(description="Ensemble de Mandelbrot avec numba")
+parser.add_argument('--precision', choices=['float64', 'float32'], default='float64',
+                    help='Précision du calcul (float32 : aperçu plus rapide)')
+args = parser.parse_args()
 
-# initial values 
+# initial values
 loop = 1000 # number of interations
 div = 1500 # divisions
-# all possible values of c
-c = np.linspace(-2,2,div)[:,np.newaxis] + 1j*np.linspace(-1.5,1.5,div)[np.newaxis,:]
-# Array that will hold colors for plot, initial value set here will be
-# the color of the points in the mandelbrot set, i.e. where the series
-# converges.
-# For the code below to work, this initial value must at least be 'loop'.
-# Here it is loop + 5
+dtype = np.dtype(args.precision)
+# axes of the grid: c = x[i] + 1j*y[j] is rebuilt inside the kernel
+x = np.linspace(-2,2,div).astype(dtype)
+y = np.linspace(-1.5,1.5,div).astype(dtype)
+tol2 = dtype.type(CYCLE_TOLERANCE[args.precision]**2)
+# compilation (ou chargement depuis le cache) hors de la mesure
+mandelbrot_iter(x[:1], y[:1], loop, tol2, dtype.type(4))
 start = time.time()
-color = mandelbrot_iter(c, loop)
+color, nb_periodic = mandelbrot_iter(x, y, loop, tol2, dtype.type(4))
 end = time.time()
 print(f"Time taken: {end - start} seconds")
+print(f"Early exits (periodic orbits): {nb_periodic}/{color.size} pixels")
 
 plt.rcParams['figure.figsize'] = [12, 7.5]
 # contour plot with real and imaginary parts of c as axes
 # and colored according to 'color'
-plt.contourf(c.real, c.imag, color)
+plt.contourf(x, y, color.T)
 plt.xlabel("Real($c$)")
 plt.ylabel("Imag($c$)")
 plt.xlim(-2,2)
 plt.ylim(-1.5,1.5)
 plt.savefig("plot.png")
-plt.show()
\ No newline at end of file
+plt.show()